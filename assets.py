@@ -0,0 +1,102 @@
+import contextlib
+import importlib
+import threading
+import time
+
+import pygame
+
+timings = []
+"""Startup measurements: [name, seconds, thread name]"""
+images = {}
+fonts = {}
+lock = threading.RLock()
+"""Guards the mixer and the music"""
+loader = None
+
+
+@contextlib.contextmanager
+def measure(name):
+    """
+    Context manager, which adds the duration of its block to timings
+    :param name: name of the measured module or asset
+    """
+    start = time.perf_counter()
+    yield
+    timings.append([name, time.perf_counter() - start, threading.current_thread().name])
+
+
+def timed_import(name):
+    """
+    Importing module and measuring the time it takes
+    :param name: name of the module
+    :return: module
+    """
+    with measure("import " + name):
+        return importlib.import_module(name)
+
+
+def image(path):
+    """
+    Returns image, which is loaded from the file on the first use. If the image is being loaded by another thread,
+    it may be loaded twice, but the first loaded copy is kept
+    :param path: path to the image
+    """
+    if path not in images:
+        with measure(path):
+            loaded = pygame.image.load(path)
+        images.setdefault(path, loaded)
+    return images[path]
+
+
+def font(path, size):
+    """
+    Returns font of a size, which is loaded from the file on the first use
+    :param path: path to the font file, None for the default pygame font
+    :param size: size of the font
+    """
+    if (path, size) not in fonts:
+        with measure(f"{path} {size}"):
+            loaded = pygame.font.Font(path, size)
+        fonts.setdefault((path, size), loaded)
+    return fonts[(path, size)]
+
+
+def mixer():
+    """
+    Returns pygame.mixer, which is initialized on the first use
+    """
+    with lock:
+        if not pygame.mixer.get_init():
+            with measure("pygame.mixer"):
+                pygame.mixer.init()
+        return pygame.mixer
+
+
+def load_in_background(paths, tasks=()):
+    """
+    Starting a thread, which loads images and then runs tasks
+    :param paths: paths to the images
+    :param tasks: functions without arguments
+    """
+    global loader
+
+    def load():
+        for path in paths:
+            image(path)
+        for task in tasks:
+            task()
+
+    loader = threading.Thread(target=load, name="loader", daemon=True)
+    loader.start()
+
+
+def report(milestones):
+    """
+    Printing startup measurements
+    :param milestones: list of [name, seconds since the start of the program]
+    """
+    rows = sorted(list(timings), key=lambda row: -row[1])
+    for name, seconds in milestones:
+        print(f"{name}: {seconds * 1000:.1f} ms")
+    for name, seconds, thread in rows:
+        print(f"{seconds * 1000:9.1f} ms  {thread:<10} {name}")
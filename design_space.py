@@ -0,0 +1,160 @@
+import argparse
+import itertools
+
+import numpy as np
+
+import parts
+import trajectory_calculation
+
+MAX_TANKS = 4
+COLUMNS = ("delta_v", "twr", "burn_time", "mass", "fuel")
+constants = trajectory_calculation.Constants(0, 0, 0, 0)
+orbit_table = None
+"""Ideal delta-v needed to reach circular orbits of different altitudes, [altitudes, delta-v]"""
+
+
+def performance(mass, exhaust_speed, fuel_consumption, fuel, engine_power=100):
+    """
+    Calculating Tsiolkovsky delta-v, initial thrust-to-weight ratio and burn time from the quantities, which
+    Rocket.get_active_parameters passes to PhysicsEngine. Works both with numbers and numpy arrays
+    :param mass: initial mass of the rocket (fuel included)
+    :param exhaust_speed: engine characteristic
+    :param fuel_consumption: engine characteristic
+    :param fuel: mass of fuel stored in tanks
+    :param engine_power: engine power in percents
+    :return: delta_v, twr, burn_time, valid (False if the rocket has more fuel than mass)
+    """
+    gravity = constants.mu_Earth / constants.rad_Earth ** 2
+    fuel_flow = engine_power * np.asarray(fuel_consumption, dtype=float)
+    dry_mass = np.asarray(mass, dtype=float) - fuel
+    valid = dry_mass > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_v = np.where(valid, exhaust_speed * np.log(mass / dry_mass), np.inf)
+        burn_time = np.where(fuel_flow > 0, fuel / fuel_flow, np.inf)
+        twr = np.where(mass > 0, fuel_flow * exhaust_speed / (mass * gravity), 0)
+    return delta_v, twr, burn_time, valid
+
+
+def orbit_altitude(delta_v):
+    """
+    Estimating the altitude of the highest circular orbit, which can be reached from the launch site with delta-v,
+    using two impulses (Hohmann transfer from the surface) and ignoring gravity losses
+    :param delta_v: delta-v in m/s, number or numpy array
+    :return: altitude in metres, nan if no orbit can be reached, inf if delta-v is enough to escape
+    """
+    global orbit_table
+    if orbit_table is None:
+        r0 = constants.rad_Earth
+        r = r0 + np.concatenate([[0], np.logspace(3, 10, 2000)])
+        perigee_speed = np.sqrt(2 * constants.mu_Earth * r / (r0 * (r0 + r)))
+        orbit_table = [r - r0, perigee_speed * (1 - r0 / r) + np.sqrt(constants.mu_Earth / r)]
+    altitudes, required = orbit_table
+    delta_v = np.asarray(delta_v, dtype=float)
+    altitude = np.interp(delta_v, required, altitudes)
+    escape = np.sqrt(2 * constants.mu_Earth / constants.rad_Earth)
+    return np.where(delta_v < required[0], np.nan, np.where(delta_v >= escape, np.inf, altitude))
+
+
+class DesignSpace:
+    """
+    All rockets, which can be assembled in the sandbox: one engine, one capsule and from 1 to MAX_TANKS fuel tanks
+    of the same width. Characteristics of all of them are calculated at once with numpy
+    """
+
+    def __init__(self, catalog=None, max_tanks=MAX_TANKS, engine_power=100):
+        """
+        Enumerating rockets and calculating their characteristics
+        :param catalog: object of class PartsCatalog from parts, the default catalog if None
+        :param max_tanks: maximum number of fuel tanks
+        :param engine_power: engine power in percents, used for thrust-to-weight ratio and burn time
+        """
+        self.catalog = catalog if catalog is not None else parts.load_catalog()
+        self.engine_power = engine_power
+
+        engines, capsules, tanks = [], [], []
+        for engine_id in self.catalog.of_type("engine"):
+            width = self.catalog.width[self.catalog.index[engine_id]]
+            tank_ids = self.catalog.fitting("fueltank", width)
+            for capsule_id in self.catalog.fitting("cabin", width):
+                for count in range(1, max_tanks + 1):
+                    for combination in itertools.combinations_with_replacement(tank_ids, count):
+                        engines.append(self.catalog.index[engine_id])
+                        capsules.append(self.catalog.index[capsule_id])
+                        tanks.append([self.catalog.index[tank_id] for tank_id in combination] +
+                                     [-1] * (max_tanks - count))
+        self.engines = np.array(engines, dtype=int)
+        self.capsules = np.array(capsules, dtype=int)
+        self.tanks = np.array(tanks, dtype=int).reshape((len(tanks), max_tanks))
+        self.calculate()
+
+    def calculate(self):
+        """
+        Calculating Tsiolkovsky delta-v, initial thrust-to-weight ratio and burn time of every rocket with the same
+        quantities, which Rocket.get_active_parameters passes to PhysicsEngine
+        """
+        has_tank = self.tanks >= 0
+
+        self.mass = self.catalog.mass[self.engines] + self.catalog.mass[self.capsules] + \
+            np.where(has_tank, self.catalog.mass[self.tanks], 0).sum(axis=1)
+        self.fuel = np.where(has_tank, self.catalog.capacity[self.tanks], 0).sum(axis=1)
+        self.delta_v, self.twr, self.burn_time, self.valid = performance(
+            self.mass, self.catalog.power[self.engines], self.catalog.consumption[self.engines], self.fuel,
+            self.engine_power)
+
+    def __len__(self):
+        """
+        Returns number of rockets
+        """
+        return len(self.engines)
+
+    def part_ids(self, i):
+        """
+        Returns ids of the parts of a rocket
+        :param i: number of the rocket
+        """
+        ids = self.catalog.ids
+        return [ids[self.engines[i]], ids[self.capsules[i]]] + [ids[tank] for tank in self.tanks[i] if tank >= 0]
+
+    def ranked(self, by="delta_v", min_delta_v=0, min_twr=0, max_burn_time=np.inf, valid_only=True, limit=None):
+        """
+        Returns numbers of rockets, which pass the filters, sorted by a column in descending order
+        :param by: one of COLUMNS
+        :param min_delta_v: minimum delta-v in m/s
+        :param min_twr: minimum thrust-to-weight ratio
+        :param max_burn_time: maximum burn time in seconds
+        :param valid_only: skip rockets, which have more fuel than mass
+        :param limit: maximum number of rockets
+        """
+        mask = (self.delta_v >= min_delta_v) & (self.twr >= min_twr) & (self.burn_time <= max_burn_time)
+        if valid_only:
+            mask &= self.valid
+        selected = np.flatnonzero(mask)
+        order = selected[np.argsort(-getattr(self, by)[selected], kind="stable")]
+        return order[:limit]
+
+    def table(self, numbers):
+        """
+        Returns text table of rockets
+        :param numbers: numbers of the rockets
+        """
+        lines = [f"{'delta-v, m/s':>13} {'TWR':>6} {'burn, s':>9} {'mass, kg':>10} {'fuel, kg':>10}  parts"]
+        for i in numbers:
+            lines.append(f"{self.delta_v[i]:13.0f} {self.twr[i]:6.2f} {self.burn_time[i]:9.0f} {self.mass[i]:10.0f} "
+                         f"{self.fuel[i]:10.0f}  {' '.join(self.part_ids(i))}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank all rockets, which can be assembled in the sandbox")
+    parser.add_argument("--sort", choices=COLUMNS, default="delta_v")
+    parser.add_argument("--min-delta-v", type=float, default=0)
+    parser.add_argument("--min-twr", type=float, default=0)
+    parser.add_argument("--max-burn-time", type=float, default=np.inf)
+    parser.add_argument("--power", type=float, default=100, help="engine power in percents")
+    parser.add_argument("--all", action="store_true", help="include rockets with more fuel than mass")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    space = DesignSpace(engine_power=args.power)
+    print(space.table(space.ranked(args.sort, args.min_delta_v, args.min_twr, args.max_burn_time,
+                                   valid_only=not args.all, limit=args.limit)))
@@ -1,5 +1,13 @@
+import numpy as np
 import pygame
 
+import assets
+import long_prediction
+import maneuver
+import particles
+import trail
+import trajectory_calculation
+
 SKY = [0, 42, 255]
 GREEN = [0, 255, 0]
 GREY = [109, 114, 135]
@@ -7,6 +15,28 @@ EARTH = [31, 67, 242]
 BLACK = [0, 0, 0]
 WHITE = [255, 255, 255]
 RED = [255, 0, 0]
+MOON = [190, 190, 190]
+GRID = [25, 25, 45]
+ORBIT = [70, 70, 90]
+ORANGE = [255, 150, 0]
+TRAIL = [80, 140, 255]
+NODE = [255, 210, 0]
+LONG_PREDICTION = [120, 220, 200]
+
+STARS = "textures/View_background/stars.jpg"
+
+ARC_POINTS = 64
+PIXEL_LIMIT = 16384
+GRID_PIXELS = 80
+ZOOM_STEP = 1.25
+TRAIL_PIXELS = 0.5
+"""Tolerance of the flown path decimation in pixels at the current zoom"""
+NODE_PIXELS = 15
+"""Distance from the mouse, at which a maneuver node can be picked"""
+NODE_STEP = 10
+"""Change of maneuver node delta-v by one key press, in m/s"""
+LONG_PREDICTION_BUDGET = 0.003
+"""Time in seconds spent on the long prediction in one frame"""
 
 
 def blit_rotate(surf, image, pos, origin_pos, angle):
@@ -30,6 +60,152 @@ def blit_rotate(surf, image, pos, origin_pos, angle):
     surf.blit(rotated_image, rotated_image_rect)
 
 
+def to_pixels(points, center, scale, size):
+    """
+    Converting world coordinates to pixel coordinates of a surface
+    :param points: array [..., 2] of world coordinates in metres
+    :param center: world point [x, y], which is placed in the centre of the surface
+    :param scale: pixels per metre
+    :param size: (width, height) of the surface
+    :return: array [..., 2] of pixel coordinates (y axis pointing down)
+    """
+    points = np.asarray(points, dtype=float)
+    pixels = np.empty(points.shape)
+    pixels[..., 0] = (points[..., 0] - center[0]) * scale + size[0] / 2
+    pixels[..., 1] = (center[1] - points[..., 1]) * scale + size[1] / 2
+    return pixels
+
+
+def circle_visibility(size, center, radius):
+    """
+    Checking how a circle is placed relative to a surface
+    :param size: (width, height) of the surface
+    :param center: pixel coordinates of the circle centre
+    :param radius: radius of the circle in pixels
+    :return: "outside" if the circle does not touch the surface, "inside" if the surface lies inside the circle,
+    "crossing" otherwise
+    """
+    dx = max(-center[0], 0, center[0] - size[0])
+    dy = max(-center[1], 0, center[1] - size[1])
+    if dx ** 2 + dy ** 2 > radius ** 2:
+        return "outside"
+    far_x = max(center[0], size[0] - center[0])
+    far_y = max(center[1], size[1] - center[1])
+    if far_x ** 2 + far_y ** 2 <= radius ** 2:
+        return "inside"
+    return "crossing"
+
+
+def visible_arc(size, center, radius):
+    """
+    Sampling the part of a big circle, which can be seen on a surface. The centre of such circle lies outside the
+    surface, so the visible part is always shorter than a half of the circle
+    :param size: (width, height) of the surface
+    :param center: pixel coordinates of the circle centre
+    :param radius: radius of the circle in pixels
+    :return: array of angles of ARC_POINTS points of the visible arc
+    """
+    corners = np.array([[0, 0], [size[0], 0], [0, size[1]], [size[0], size[1]]], dtype=float) - center
+    middle = np.arctan2(size[1] / 2 - center[1], size[0] / 2 - center[0])
+    offsets = (np.arctan2(corners[:, 1], corners[:, 0]) - middle + np.pi) % (2 * np.pi) - np.pi
+    return np.linspace(middle + offsets.min(), middle + offsets.max(), ARC_POINTS)
+
+
+def draw_disc(surface, color, center, radius):
+    """
+    Drawing a filled circle of any radius. Circles which are too big for pygame.draw.circle are replaced with a
+    polygon covering only the visible part of them
+    :param surface: target surface
+    :param color: color of the circle
+    :param center: pixel coordinates of the circle centre
+    :param radius: radius of the circle in pixels
+    """
+    size = surface.get_size()
+    visibility = circle_visibility(size, center, radius)
+    diagonal = (size[0] ** 2 + size[1] ** 2) ** 0.5
+    if visibility == "outside":
+        return
+    if visibility == "inside":
+        surface.fill(color)
+    elif radius < 4 * diagonal:
+        pygame.draw.circle(surface, color, (center[0], center[1]), max(radius, 1))
+    else:
+        angles = visible_arc(size, center, radius)
+        outer = radius * np.column_stack([np.cos(angles), np.sin(angles)])
+        inner = (radius - diagonal - 2) * np.column_stack([np.cos(angles[::-1]), np.sin(angles[::-1])])
+        pygame.draw.polygon(surface, color, (np.vstack([outer, inner]) + center).tolist())
+
+
+def draw_ring(surface, color, center, radius):
+    """
+    Drawing an outline of a circle of any radius, only the visible part of big circles is drawn
+    :param surface: target surface
+    :param color: color of the circle
+    :param center: pixel coordinates of the circle centre
+    :param radius: radius of the circle in pixels
+    """
+    size = surface.get_size()
+    if circle_visibility(size, center, radius) != "crossing":
+        return
+    if radius < 4 * (size[0] ** 2 + size[1] ** 2) ** 0.5:
+        pygame.draw.circle(surface, color, (center[0], center[1]), max(radius, 1), width=1)
+    else:
+        angles = visible_arc(size, center, radius)
+        arc = radius * np.column_stack([np.cos(angles), np.sin(angles)]) + center
+        pygame.draw.lines(surface, color, False, arc.tolist())
+
+
+def draw_polyline(surface, color, points, width=1):
+    """
+    Drawing a polyline in one call per visible run of points, segments lying outside the surface are skipped
+    :param surface: target surface
+    :param color: color of the line
+    :param points: array [n, 2] of pixel coordinates
+    :param width: width of the line
+    """
+    if len(points) < 2:
+        return
+    size = surface.get_size()
+    start, end = points[:-1], points[1:]
+    segment_visible = (np.minimum(start[:, 0], end[:, 0]) < size[0]) & (np.maximum(start[:, 0], end[:, 0]) >= 0) & \
+                      (np.minimum(start[:, 1], end[:, 1]) < size[1]) & (np.maximum(start[:, 1], end[:, 1]) >= 0)
+    if not segment_visible.any():
+        return
+    keep = np.zeros(len(points), dtype=bool)
+    keep[:-1] |= segment_visible
+    keep[1:] |= segment_visible
+    points = np.clip(points, -PIXEL_LIMIT, PIXEL_LIMIT)
+    indexes = np.flatnonzero(keep)
+    for run in np.split(indexes, np.flatnonzero(np.diff(indexes) > 1) + 1):
+        pygame.draw.lines(surface, color, False, points[run].tolist(), width)
+
+
+def draw_markers(surface, color, points, radius=1):
+    """
+    Drawing small squares at many points at once, points outside the surface are skipped
+    :param surface: target surface
+    :param color: color of the squares
+    :param points: array [n, 2] of pixel coordinates
+    :param radius: half of the side of a square in pixels
+    """
+    size = surface.get_size()
+    points = np.rint(np.clip(points, -PIXEL_LIMIT, PIXEL_LIMIT)).astype(int)
+    points = points[(points[:, 0] >= 0) & (points[:, 0] < size[0]) & (points[:, 1] >= 0) & (points[:, 1] < size[1])]
+    if len(points) == 0:
+        return
+    offsets = np.arange(-radius, radius + 1)
+    xs = np.clip(points[:, 0, None] + offsets, 0, size[0] - 1)
+    ys = np.clip(points[:, 1, None] + offsets, 0, size[1] - 1)
+    try:
+        pixels = pygame.surfarray.pixels2d(surface)
+    except ValueError:
+        for x, y in points:
+            pygame.draw.rect(surface, color, (x - radius, y - radius, 2 * radius + 1, 2 * radius + 1))
+        return
+    pixels[xs[:, :, None], ys[:, None, :]] = surface.map_rgb(color)
+    del pixels
+
+
 class View:
     """
     Class of different views
@@ -51,6 +227,7 @@ class View:
         self.surface = pygame.Surface((self.width, self.height))
         self.rocket = rocket
         self.engine = None
+        self.alpha = 1.0
 
     def draw(self):
         """
@@ -58,12 +235,28 @@ class View:
         """
         pass
 
-    def set_engine(self, engine):
+    def set_engine(self, engine, alpha=1.0):
         """
         Setting the engine to get its parameters
         :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param alpha: position of the frame between the two last physics steps, from 0 to 1
         """
         self.engine = engine
+        self.alpha = alpha
+
+    def rocket_state(self):
+        """
+        Rocket state interpolated to the moment of the frame
+        :return: [x, y, vx, vy] array, time
+        """
+        return self.engine.rocket_parameters.interpolate(self.alpha)
+
+    def rocket_angle(self):
+        """
+        Rocket angle interpolated to the moment of the frame
+        :return: angle in degrees
+        """
+        return self.rocket.previous_angle + (self.rocket.angle - self.rocket.previous_angle) * self.alpha
 
 
 class RocketView(View):
@@ -79,24 +272,55 @@ class RocketView(View):
         :param rocket: object of class Rocket from sandbox
         """
         View.__init__(self, width / 2, 2 * height / 3, 0, height / 3, rocket)
+        self.rocket_surface = None
+        self.rocket_drawn = None
+        self.particles = particles.ParticleSystem()
+        self.ticks = None
+
+    def emit_debris(self):
+        """
+        Emitting a burst of debris from the rocket, used when something is separated from it
+        """
+        self.particles.emit(60, (self.width / 2, self.height / 2), (0, 0), 120, 2.0, particles.DEBRIS)
+
+    def draw_particles(self, engine_power, h):
+        """
+        Emitting exhaust from the nozzle, moving and drawing particles
+        :param engine_power: current engine power in percents, 0 if there is no fuel
+        :param h: distance from the top of the scaled rocket to its pivot point multiplied by 2
+        """
+        ticks = pygame.time.get_ticks()
+        dt = 0 if self.ticks is None else min((ticks - self.ticks) / 1000, 0.1)
+        self.ticks = ticks
+        self.particles.update(dt)
+        if engine_power > 0 and self.engine.rocket_parameters.engine_is_on_flag:
+            nozzle_y = self.rocket.engine_bottom * self.rocket_surface.get_height() / self.rocket.surface.get_height()
+            direction = pygame.math.Vector2(0, 1).rotate(-self.rocket_angle())
+            nozzle = pygame.math.Vector2(self.width / 2, self.height / 2) + direction * (nozzle_y - h / 2)
+            position = self.rocket_state()[0][:2]
+            altitude = (position[0] ** 2 + position[1] ** 2) ** 0.5 - self.engine.constants.rad_Earth
+            self.particles.emit_engine(dt, nozzle, direction, engine_power, self.engine.constants.fuel_consumption,
+                                       altitude)
+        self.particles.draw(self.surface)
 
     def draw(self):
         """
         Drawing rocket on a RocketView surface according to its direction
         """
         self.surface.fill((0, 0, 0, 0))
-        self.surface.blit(pygame.image.load("textures/View_background/stars.jpg"), (0, 0))
-        if self.engine.rocket_parameters.fuel_remained <= 0:
-            self.rocket.draw(0)
-        else:
-            self.rocket.draw(self.engine.rocket_parameters.engine_power)
-        h = 0
-        for part in self.rocket.parts:
-            h += (part.texture.get_size()[1] / 1.5)
-        self.rocket.surface = pygame.transform.scale(self.rocket.surface, (100 / 1.2, 800 / 1.5))
-        blit_rotate(self.surface, self.rocket.surface,
+        self.surface.blit(assets.image(STARS), (0, 0))
+        engine_power = 0
+        if self.engine.rocket_parameters.fuel_remained > 0:
+            engine_power = self.engine.rocket_parameters.engine_power
+        self.rocket.draw(engine_power)
+        if self.rocket_drawn != self.rocket.drawn:
+            self.rocket_drawn = self.rocket.drawn
+            self.rocket_surface = pygame.transform.scale(self.rocket.surface, (100 / 1.2, 800 / 1.5))
+        h = self.rocket.parts_height / 1.5
+        self.draw_particles(engine_power, h)
+        blit_rotate(self.surface, self.rocket_surface,
                     (self.width / 2, self.height / 2),
-                    (self.rocket.parts[0].texture.get_size()[0] / (2 * 1.2), h / 2), self.rocket.angle)
+                    (self.rocket.parts[0].texture.get_size()[0] / (2 * 1.2), h / 2), self.rocket_angle())
 
 
 class ParametersView(View):
@@ -112,25 +336,63 @@ class ParametersView(View):
         :param rocket: object of class Rocket from sandbox
         """
         View.__init__(self, width / 2, height / 3, 0, 0, rocket)
-        self.font = pygame.font.Font(None, 40)
-        self.font_big = pygame.font.Font(None, 60)
+        self.font = assets.font(None, 40)
+        self.font_big = assets.font(None, 60)
         self.rocket_param = None
         self.time = None
         self.speed = None
         self.height = None
         self.fuel = None
         self.power = None
+        self.contact = None
+        self.font_small = assets.font(None, 30)
+        self.orbit = None
+        self.orbit_text = {}
+
+    def render_orbit_line(self, name, text):
+        """
+        Returns rendered line of the orbit panel, the line is rendered again only when its text changes
+        :param name: name of the line
+        :param text: text of the line
+        """
+        if name not in self.orbit_text or self.orbit_text[name][0] != text:
+            self.orbit_text[name] = text, self.font_small.render(text, True, [0, 0, 0])
+        return self.orbit_text[name][1]
+
+    def draw_orbit(self):
+        """
+        Drawing orbital elements. They are calculated again only when energy or angular momentum of the rocket
+        changes, times to apsides are counted down between the calculations
+        """
+        constants = self.engine.constants
+        parameters = self.engine.rocket_parameters
+        if self.orbit is None or not self.orbit.is_close(parameters.parameters, constants.mu_Earth):
+            self.orbit = self.engine.calc_orbital_elements()
+        orbit = self.orbit
+        to_apoapsis, to_periapsis = orbit.time_to_apsides(self.rocket_state()[1])
+
+        def kilometres(value):
+            return f"{value / 1000:.1f} км" if np.isfinite(value) else "-"
+
+        def seconds(value):
+            return f"{value:.0f} c" if np.isfinite(value) else "-"
+
+        lines = [("a", f"a = {kilometres(orbit.semi_major_axis if orbit.bound else np.inf)}"),
+                 ("e", f"e = {orbit.eccentricity:.4f}"),
+                 ("apoapsis", f"Apoapsis = {kilometres(orbit.apoapsis)}, in {seconds(to_apoapsis)}"),
+                 ("periapsis", f"Periapsis = {kilometres(orbit.periapsis)}, in {seconds(to_periapsis)}"),
+                 ("period", f"Period = {seconds(orbit.period)}")]
+        for i, (name, text) in enumerate(lines):
+            self.surface.blit(self.render_orbit_line(name, text), (20, 80 + 34 * i))
 
     def define_text(self):
         """
         Defining rocket parameters at a particular moment
         """
-        x = self.engine.rocket_parameters.parameters[0]
-        y = self.engine.rocket_parameters.parameters[1]
-        vx = self.engine.rocket_parameters.parameters[2]
-        vy = self.engine.rocket_parameters.parameters[3]
+        parameters, time = self.rocket_state()
+        x, y, vx, vy = parameters
         self.rocket_param = self.font_big.render("Rocket parameters", True, [0., 0, 0])
-        self.time = self.font.render(f"Time = {self.engine.rocket_parameters.current_time:.1f} c", True, [0, 0, 0])
+        self.time = self.font.render(f"Time = {time:.1f} c", True, [0, 0, 0])
         self.speed = self.font.render(f"Speed = {((vx ** 2 + vy ** 2) ** 0.5):.2f} м/c", True, [0, 0, 0])
         self.height = self.font.render(
             f"Height = {((x ** 2 + y ** 2) ** 0.5 - self.engine.constants.rad_Earth) / 1000:.2f} км",
@@ -138,6 +400,16 @@ class ParametersView(View):
             [0, 0, 0])
         self.fuel = self.font.render("Fuel", True, [0, 0, 0])
         self.power = self.font.render("Power", True, [0, 0, 0])
+        parameters = self.engine.rocket_parameters
+        contact = parameters.predicted_contact
+        if parameters.contact is not None and (parameters.landed_flag or parameters.collision_flag):
+            self.contact = self.font.render(str(parameters.contact).split(",")[0], True, [0, 0, 0])
+        elif contact is not None:
+            self.contact = self.font.render(
+                f"{trajectory_calculation.BODIES[contact.body]} in {contact.time - time:.0f} c, "
+                f"{contact.speed:.0f} м/c", True, RED if not contact.landed else [0, 0, 0])
+        else:
+            self.contact = None
 
     def blit_text(self):
         """
@@ -149,6 +421,8 @@ class ParametersView(View):
         self.surface.blit(self.speed, (self.width / 2 - 100, 160))
         self.surface.blit(self.fuel, (self.width / 2 - 100, 200))
         self.surface.blit(self.power, (self.width / 2 - 100, 240))
+        if self.contact is not None:
+            self.surface.blit(self.contact, (self.width / 2 - 100, 290))
 
     def draw_rect(self):
         """
@@ -173,9 +447,78 @@ class ParametersView(View):
         self.surface.fill(GREY)
         self.define_text()
         self.blit_text()
+        self.draw_orbit()
         self.draw_rect()
 
 
+class Camera:
+    """
+    Camera of a SpaceView: the world point shown in the centre of the view and the zoom
+    """
+
+    def __init__(self, width, height):
+        """
+        Initializing camera
+        :param width: width of a view
+        :param height: height of a view
+        """
+        self.width = width
+        self.height = height
+        self.center = np.zeros(2)
+        self.scale = 0
+        self.min_scale = 0
+        self.max_scale = 10
+        self.follow = False
+
+    def reset(self, scale, min_scale):
+        """
+        Centering the camera on the Earth with the given zoom
+        :param scale: pixels per metre
+        :param min_scale: the smallest zoom allowed
+        """
+        self.center = np.zeros(2)
+        self.scale = scale
+        self.min_scale = min_scale
+        self.follow = False
+
+    def world_to_screen(self, points):
+        """
+        Converting world coordinates to pixel coordinates of the view
+        :param points: array [..., 2] of world coordinates in metres
+        :return: array [..., 2] of pixel coordinates
+        """
+        return to_pixels(points, self.center, self.scale, (self.width, self.height))
+
+    def screen_to_world(self, position):
+        """
+        Converting pixel coordinates of the view to world coordinates
+        :param position: [x, y] pixel coordinates
+        :return: array [x, y] of world coordinates in metres
+        """
+        return self.center + np.array([position[0] - self.width / 2, self.height / 2 - position[1]]) / self.scale
+
+    def zoom(self, factor, anchor=None):
+        """
+        Changing the zoom, the world point under the anchor stays in place
+        :param factor: zoom multiplier, greater than 1 to zoom in
+        :param anchor: [x, y] pixel coordinates of the zoom centre, centre of the view by default
+        """
+        if anchor is None:
+            anchor = (self.width / 2, self.height / 2)
+        fixed_point = self.screen_to_world(anchor)
+        self.scale = min(max(self.scale * factor, self.min_scale), self.max_scale)
+        self.center += fixed_point - self.screen_to_world(anchor)
+
+    def pan(self, dx, dy):
+        """
+        Moving the camera, following the rocket is switched off
+        :param dx: shift of the picture to the right in pixels
+        :param dy: shift of the picture down in pixels
+        """
+        self.center += np.array([-dx, dy]) / self.scale
+        self.follow = False
+
+
 class SpaceView(View):
     """
     Class of a view with a planet and rocket position on the map
@@ -190,30 +533,259 @@ class SpaceView(View):
         """
         View.__init__(self, width / 2, height, width / 2, 0, rocket)
         self.scale = 0
+        self.camera = Camera(self.width, self.height)
+        self.dragging = False
+        self.layer = pygame.Surface((2 * self.width, 2 * self.height))
+        self.layer_scale = 0
+        self.layer_center = np.zeros(2)
+        self.scene = None
+        self.trail = trail.Trail()
+        self.trail_vehicle = 0
+        self.planner = maneuver.ManeuverPlanner()
+        self.dragging_node = None
+        self.long_prediction = None
+        self.font = assets.font(None, 24)
+
+    def nearest_point(self, orbit, mouse):
+        """
+        Finding point of a trajectory nearest to the mouse, the first point is skipped
+        :param orbit: [n, 4] array of trajectory points
+        :param mouse: mouse position on the view
+        :return: number of the point, None if the trajectory is too short
+        """
+        if len(orbit) < 2:
+            return None
+        distance = np.linalg.norm(self.camera.world_to_screen(orbit[1:, :2]) - mouse, axis=1)
+        return int(np.argmin(distance)) + 1
+
+    def handle_node_events(self, event, mouse, mouse_inside):
+        """
+        Controlling maneuver nodes: N adds a node at the point of the last trajectory nearest to the mouse,
+        dragging with the right mouse button moves a node along its trajectory, I/K change prograde delta-v,
+        J/L change radial delta-v and Delete removes the selected node
+        :param event: event
+        :param mouse: mouse position on the view
+        :param mouse_inside: whether the mouse is over the view
+        """
+        planner = self.planner
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_n and mouse_inside:
+            orbit, times = planner.base_trajectory(self.engine, len(planner.nodes))
+            i = self.nearest_point(orbit, mouse)
+            if i is not None:
+                planner.add_node(self.engine, times[i])
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3 and mouse_inside and planner.nodes:
+            positions = self.camera.world_to_screen(np.array([node.state[:2] for node in planner.nodes]))
+            distance = np.linalg.norm(positions - mouse, axis=1)
+            if distance.min() <= NODE_PIXELS:
+                self.dragging_node = planner.selected = planner.nodes[int(np.argmin(distance))]
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.dragging_node = None
+        elif event.type == pygame.MOUSEMOTION and self.dragging_node in planner.nodes:
+            orbit, times = planner.base_trajectory(self.engine, planner.nodes.index(self.dragging_node))
+            i = self.nearest_point(orbit, mouse)
+            if i is not None:
+                self.dragging_node.time = times[i]
+        elif event.type == pygame.KEYDOWN and planner.selected is not None:
+            if event.key == pygame.K_i:
+                planner.selected.prograde += NODE_STEP
+            if event.key == pygame.K_k:
+                planner.selected.prograde -= NODE_STEP
+            if event.key == pygame.K_l:
+                planner.selected.radial += NODE_STEP
+            if event.key == pygame.K_j:
+                planner.selected.radial -= NODE_STEP
+            if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
+                planner.remove_node(planner.selected)
+
+    def handle_events(self, events):
+        """
+        Controlling the camera: mouse wheel zooms, dragging with the left mouse button moves the map,
+        F switches following the rocket, H returns to the initial view, M shows or hides the long prediction.
+        Maneuver nodes are controlled by handle_node_events
+        :param events: events
+        """
+        mouse = pygame.mouse.get_pos()
+        mouse = (mouse[0] - self.x, mouse[1] - self.y)
+        mouse_inside = 0 <= mouse[0] < self.width and 0 <= mouse[1] < self.height
+        for event in events:
+            if event.type == pygame.MOUSEWHEEL and mouse_inside:
+                self.camera.zoom(ZOOM_STEP ** event.y, None if self.camera.follow else mouse)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and mouse_inside:
+                self.dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.dragging = False
+            elif event.type == pygame.MOUSEMOTION and self.dragging:
+                self.camera.pan(*event.rel)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_f:
+                    self.camera.follow = not self.camera.follow
+                if event.key == pygame.K_h:
+                    self.camera.scale = 0
+                if event.key == pygame.K_m:
+                    self.long_prediction = None if self.long_prediction else long_prediction.LongPrediction()
+            if self.engine is not None and self.scale != 0:
+                self.handle_node_events(event, mouse, mouse_inside)
+
+    def layer_is_valid(self):
+        """
+        Checking whether the cached static layer can be used for the current camera position
+        :return: True if the layer has the same zoom and covers the whole view
+        """
+        if self.layer_scale != self.camera.scale:
+            return False
+        shift = np.abs(self.camera.center - self.layer_center) * self.camera.scale
+        return shift[0] <= self.width / 2 and shift[1] <= self.height / 2
+
+    def draw_grid(self):
+        """
+        Drawing a coordinate grid on the static layer, the step is a power of 10 metres
+        """
+        size = self.layer.get_size()
+        step = 10 ** np.ceil(np.log10(GRID_PIXELS / self.layer_scale))
+        bottom_left = self.layer_center - np.array(size) / 2 / self.layer_scale
+        for x in np.arange(np.ceil(bottom_left[0] / step), bottom_left[0] / step + size[0] / GRID_PIXELS) * step:
+            pixel = to_pixels([x, 0], self.layer_center, self.layer_scale, size)[0]
+            pygame.draw.line(self.layer, GRID, (pixel, 0), (pixel, size[1]))
+        for y in np.arange(np.ceil(bottom_left[1] / step), bottom_left[1] / step + size[1] / GRID_PIXELS) * step:
+            pixel = to_pixels([0, y], self.layer_center, self.layer_scale, size)[1]
+            pygame.draw.line(self.layer, GRID, (0, pixel), (size[0], pixel))
+
+    def render_layer(self):
+        """
+        Rendering static objects (grid, Moon orbit and the Earth) onto a cached surface twice as big as the view.
+        The surface is rendered again only when zoom changes or the camera leaves the cached area
+        """
+        self.layer_scale = self.camera.scale
+        self.layer_center = self.camera.center.copy()
+        size = self.layer.get_size()
+        origin = to_pixels([0, 0], self.layer_center, self.layer_scale, size)
+        self.layer.fill(BLACK)
+        self.draw_grid()
+        draw_ring(self.layer, ORBIT, origin, self.engine.constants.moon_rad * self.layer_scale)
+        draw_disc(self.layer, EARTH, origin, self.engine.constants.rad_Earth * self.layer_scale)
 
     def draw_planet(self):
         """
-        Drawing a planet
+        Drawing static layer with the planet and the Moon at its current position
         """
-        pygame.draw.circle(self.surface, EARTH, (self.width / 2, self.height / 2), self.height / 6)
+        if not self.layer_is_valid():
+            self.render_layer()
+        offset = (self.camera.center - self.layer_center) * self.layer_scale
+        self.surface.blit(self.layer, (0, 0), area=pygame.Rect(self.width / 2 + offset[0],
+                                                               self.height / 2 - offset[1],
+                                                               self.width, self.height))
+        moon = self.engine.calc_moon_position(self.rocket_state()[1])
+        draw_disc(self.surface, MOON, self.camera.world_to_screen(moon),
+                  max(self.engine.constants.rad_Moon * self.scale, 2))
 
     def draw_trajectory(self):
         """
         Drawing predicative orbit
         """
-        for current in self.engine.rocket_parameters.predictive_orbit:
-            pygame.draw.circle(self.surface, WHITE,
-                               (self.scale * current[0] + self.width / 2, -self.scale * current[1] + self.height / 2),
-                               1)
+        orbit = self.engine.rocket_parameters.predictive_orbit
+        draw_polyline(self.surface, WHITE, self.camera.world_to_screen(orbit[:, :2]))
+        contact = self.engine.rocket_parameters.predicted_contact
+        if contact is not None:
+            point = self.camera.world_to_screen(contact.position)
+            if circle_visibility((self.width, self.height), point, 5) != "outside":
+                pygame.draw.circle(self.surface, GREEN if contact.landed else RED, point, 5, width=2)
+
+    def draw_long_prediction(self, position):
+        """
+        Extending the long prediction within LONG_PREDICTION_BUDGET and drawing it with the Moon and the rocket at
+        the closest approach
+        :param position: [x, y] interpolated position of the rocket
+        """
+        prediction = self.long_prediction
+        prediction.update(self.engine, LONG_PREDICTION_BUDGET)
+        orbit = prediction.trajectory(self.engine.rocket_parameters.current_time)[0]
+        draw_polyline(self.surface, LONG_PREDICTION,
+                      self.camera.world_to_screen(np.vstack([position, orbit[:, :2]])))
+        if prediction.closest_time is None:
+            return
+        moon = self.camera.world_to_screen(prediction.moon_position)
+        rocket = self.camera.world_to_screen(prediction.closest_position)
+        radius = max(self.engine.constants.rad_Moon * self.scale, 3)
+        if circle_visibility((self.width, self.height), moon, radius) != "outside":
+            pygame.draw.circle(self.surface, LONG_PREDICTION, moon, radius, width=1)
+        if circle_visibility((self.width, self.height), rocket, 4) != "outside":
+            pygame.draw.circle(self.surface, LONG_PREDICTION, rocket, 4, width=1)
+            hours = (prediction.closest_time - self.engine.rocket_parameters.current_time) / 3600
+            text = f"Moon {(prediction.closest_distance - self.engine.constants.rad_Moon) / 1000:.0f} км, " \
+                   f"in {hours:.1f} h{'' if prediction.complete else '...'}"
+            self.surface.blit(self.font.render(text, True, LONG_PREDICTION), (rocket[0] + 10, rocket[1] - 8))
+
+    def draw_nodes(self):
+        """
+        Drawing maneuver nodes and trajectories after them, trajectories are calculated again only for changed
+        nodes
+        """
+        self.planner.update(self.engine)
+        for node in self.planner.nodes:
+            orbit = node.trajectory()[0]
+            draw_polyline(self.surface, NODE, self.camera.world_to_screen(orbit[:, :2]))
+            point = self.camera.world_to_screen(node.state[:2])
+            if circle_visibility((self.width, self.height), point, 6) == "outside":
+                continue
+            pygame.draw.circle(self.surface, NODE, point, 6, width=0 if node is self.planner.selected else 2)
+            elements = node.elements
+            text = f"dv = {node.delta_v():.0f} м/c, Pe = {elements.periapsis / 1000:.0f} км"
+            if elements.bound:
+                text += f", Ap = {elements.apoapsis / 1000:.0f} км"
+            self.surface.blit(self.font.render(text, True, NODE), (point[0] + 10, point[1] - 8))
+
+    def set_scene(self, scene):
+        """
+        Setting the scene to draw all its vehicles
+        :param scene: object of class Scene from vehicles
+        """
+        self.scene = scene
+        self.trail.clear()
+        self.planner.clear()
+        self.trail_vehicle = scene.controlled
+
+    def draw_trail(self, position):
+        """
+        Adding the current position of the rocket to the flown path and drawing the path
+        :param position: [x, y] interpolated position of the rocket
+        """
+        if self.scene is not None and self.scene.controlled != self.trail_vehicle:
+            self.trail.clear()
+            self.planner.clear()
+            self.trail_vehicle = self.scene.controlled
+        self.trail.set_tolerance(TRAIL_PIXELS / self.scale)
+        self.trail.add(self.engine.rocket_parameters.previous_parameters[:2])
+        draw_polyline(self.surface, TRAIL, self.camera.world_to_screen(self.trail.path(position)))
+
+    def draw_vehicles(self):
+        """
+        Drawing vehicles of the scene, which are not controlled
+        """
+        positions, collided = self.scene.positions(self.alpha)
+        pixels = self.camera.world_to_screen(positions)
+        draw_markers(self.surface, ORANGE, pixels[~collided], 2)
+        draw_markers(self.surface, RED, pixels[collided], 2)
 
     def draw(self):
         """
-        Drawing planet and predicative orbit
+        Drawing planet, predicative orbit and vehicles
         """
-        self.surface.fill(BLACK)
-        self.scale = self.height / (6 * self.engine.constants.rad_Earth)
-        x = self.engine.rocket_parameters.parameters[0]
-        y = self.engine.rocket_parameters.parameters[1]
+        if self.camera.scale == 0:
+            constants = self.engine.constants
+            self.camera.reset(self.height / (6 * constants.rad_Earth),
+                              min(self.width, self.height) / (2.5 * constants.moon_rad))
+        position = self.rocket_state()[0][:2]
+        if self.camera.follow:
+            self.camera.center = position.copy()
+        self.scale = self.camera.scale
         self.draw_planet()
-        pygame.draw.circle(self.surface, GREEN, (self.scale * x + self.width / 2, -self.scale * y + self.height / 2), 4)
+        self.draw_trail(position)
         self.draw_trajectory()
+        if self.long_prediction is not None:
+            self.draw_long_prediction(position)
+        self.draw_nodes()
+        if self.scene is not None:
+            self.draw_vehicles()
+        rocket = self.camera.world_to_screen(position)
+        if circle_visibility((self.width, self.height), rocket, 4) != "outside":
+            pygame.draw.circle(self.surface, GREEN, rocket, 4)
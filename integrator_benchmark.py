@@ -0,0 +1,190 @@
+import argparse
+import time
+
+import numpy as np
+
+import trajectory_calculation
+
+CHECKPOINTS = 20
+RK4_STEPS = (0.25, 0.5, 1, 2, 5, 10, 20, 50)
+EULER_STEPS = (1, 2, 5, 10, 20, 50)
+"""Steps of the predicative Euler method in seconds, constants.step is set to step / 20"""
+
+
+def stumpff(z):
+    """
+    Returns Stumpff functions S(z) and C(z) used by the universal Kepler equation
+    :param z: alpha * chi ** 2
+    """
+    if z > 1e-8:
+        root = np.sqrt(z)
+        return (root - np.sin(root)) / root ** 3, (1 - np.cos(root)) / z
+    if z < -1e-8:
+        root = np.sqrt(-z)
+        return (np.sinh(root) - root) / root ** 3, (np.cosh(root) - 1) / -z
+    return 1 / 6, 1 / 2
+
+
+def kepler_state(parameters, mu, dt):
+    """
+    Calculating the state of a body moving around a point mass after some time with the universal variable form
+    of the Kepler equation, works for elliptical, parabolic and hyperbolic orbits
+    :param parameters: [x, y, vx, vy] array of the initial state
+    :param mu: gravitational parameter
+    :param dt: time of flight
+    :return: [x, y, vx, vy] array
+    """
+    position, velocity = parameters[:2], parameters[2:]
+    r0 = np.linalg.norm(position)
+    radial_speed = np.dot(position, velocity) / r0
+    alpha = 2 / r0 - np.dot(velocity, velocity) / mu
+    root_mu = np.sqrt(mu)
+    chi = root_mu * abs(alpha) * dt
+    for _ in range(100):
+        z = alpha * chi ** 2
+        s, c = stumpff(z)
+        f = r0 * radial_speed / root_mu * chi ** 2 * c + (1 - alpha * r0) * chi ** 3 * s + r0 * chi - root_mu * dt
+        derivative = r0 * radial_speed / root_mu * chi * (1 - z * s) + (1 - alpha * r0) * chi ** 2 * c + r0
+        chi -= f / derivative
+        if abs(f / derivative) < 1e-10 * max(abs(chi), 1):
+            break
+    z = alpha * chi ** 2
+    s, c = stumpff(z)
+    new_position = (1 - chi ** 2 / r0 * c) * position + (dt - chi ** 3 * s / root_mu) * velocity
+    r = np.linalg.norm(new_position)
+    new_velocity = root_mu / (r * r0) * (alpha * chi ** 3 * s - chi) * position + (1 - chi ** 2 / r * c) * velocity
+    return np.concatenate([new_position, new_velocity])
+
+
+def create_cases(constants):
+    """
+    Returns test orbits: circular, elliptical and hyperbolic, all starting at the periapsis
+    :param constants: object of class Constants from trajectory_calculation
+    :return: list of [name, [x, y, vx, vy], duration]
+    """
+    mu = constants.mu_Earth
+    periapsis = constants.rad_Earth + 6e5
+    circular = np.sqrt(mu / periapsis)
+    apoapsis = 4 * periapsis
+    semi_major_axis = (periapsis + apoapsis) / 2
+    elliptical = np.sqrt(mu * (2 / periapsis - 1 / semi_major_axis))
+    escape = np.sqrt(2 * mu / periapsis)
+    return [["circular", np.array([periapsis, 0, 0, circular]), 2 * np.pi * np.sqrt(periapsis ** 3 / mu)],
+            ["elliptical", np.array([periapsis, 0, 0, elliptical]),
+             2 * np.pi * np.sqrt(semi_major_axis ** 3 / mu)],
+            ["hyperbolic", np.array([periapsis, 0, 0, 1.3 * escape]), 2e4]]
+
+
+def invariants(parameters, mu):
+    """
+    Returns specific orbital energy and angular momentum
+    :param parameters: [x, y, vx, vy] array
+    :param mu: gravitational parameter
+    """
+    x, y, vx, vy = parameters
+    return (vx ** 2 + vy ** 2) / 2 - mu / np.hypot(x, y), x * vy - y * vx
+
+
+def run(integrator, step, initial, duration):
+    """
+    Integrating a test orbit with the engine off and without the Moon
+    :param integrator: "rk4" for calc_step or "euler" for calc_step_euler
+    :param step: step in seconds
+    :param initial: [x, y, vx, vy] array of the initial state
+    :param duration: time of flight
+    :return: dictionary with maximum position error, energy drift, angular momentum drift and steps per second
+    """
+    engine = trajectory_calculation.PhysicsEngine(1, 0, 0, 0, 0, initial.copy())
+    engine.switch_engine(False, 0)
+    constants = engine.constants
+    constants.mu_moon = 0
+    constants.step = step if integrator == "rk4" else step / 20
+    mu = constants.mu_Earth
+    energy, momentum = invariants(initial, mu)
+
+    steps = int(round(duration / step))
+    checkpoints = np.unique(np.linspace(0, steps, CHECKPOINTS + 1).astype(int))[1:]
+    exact = initial
+    exact_time = 0.0
+    position_error = energy_drift = momentum_drift = 0.0
+    state, state_time = initial.copy(), 0.0
+    done = 0
+    seconds = 0.0
+    for checkpoint in checkpoints:
+        start = time.perf_counter()
+        if integrator == "rk4":
+            for _ in range(checkpoint - done):
+                engine.calc_step()
+            state = engine.rocket_parameters.parameters
+            state_time = engine.rocket_parameters.current_time
+        else:
+            for _ in range(checkpoint - done):
+                state, state_time = engine.calc_step_euler(state, state_time)
+        seconds += time.perf_counter() - start
+        done = checkpoint
+
+        exact = kepler_state(exact, mu, state_time - exact_time)
+        exact_time = state_time
+        current_energy, current_momentum = invariants(state, mu)
+        position_error = max(position_error, np.linalg.norm(state[:2] - exact[:2]))
+        energy_drift = max(energy_drift, abs(current_energy - energy) / abs(energy))
+        momentum_drift = max(momentum_drift, abs(current_momentum - momentum) / abs(momentum))
+    return {"position_error": position_error, "energy_drift": energy_drift, "momentum_drift": momentum_drift,
+            "steps_per_second": steps / seconds, "speed_up": duration / seconds}
+
+
+def pareto(rows):
+    """
+    Marking rows, for which no other row is both more accurate and faster
+    :param rows: list of dictionaries returned by run
+    :return: list of flags
+    """
+    return [not any(other["position_error"] <= row["position_error"] and other["speed_up"] >= row["speed_up"] and
+                    (other["position_error"] < row["position_error"] or other["speed_up"] > row["speed_up"])
+                    for other in rows) for row in rows]
+
+
+def benchmark(integrators=("rk4", "euler"), duration_scale=1.0):
+    """
+    Running all test orbits with all integrators and steps
+    :param integrators: names of the integrators
+    :param duration_scale: multiplier of the time of flight of the test orbits
+    :return: list of [case name, list of rows]
+    """
+    steps = {"rk4": RK4_STEPS, "euler": EULER_STEPS}
+    results = []
+    for name, initial, duration in create_cases(trajectory_calculation.Constants(0, 0, 0, 0)):
+        rows = []
+        for integrator in integrators:
+            for step in steps[integrator]:
+                row = run(integrator, step, initial, duration * duration_scale)
+                row.update(integrator=integrator, step=step)
+                rows.append(row)
+        results.append([name, rows])
+    return results
+
+
+def table(results):
+    """
+    Returns text table of the benchmark, Pareto optimal rows are marked with *
+    :param results: list returned by benchmark
+    """
+    lines = []
+    for name, rows in results:
+        lines.append(f"{name}:")
+        lines.append(f"  {'':1} {'method':<6} {'step, s':>7} {'max error, m':>13} {'energy':>9} {'momentum':>9} "
+                     f"{'steps/s':>9} {'sim s/s':>9}")
+        for row, optimal in sorted(zip(rows, pareto(rows)), key=lambda pair: pair[0]["position_error"]):
+            lines.append(f"  {'*' if optimal else '':1} {row['integrator']:<6} {row['step']:7g} "
+                         f"{row['position_error']:13.4g} {row['energy_drift']:9.2e} {row['momentum_drift']:9.2e} "
+                         f"{row['steps_per_second']:9.0f} {row['speed_up']:9.0f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare accuracy and speed of the integrators against Kepler orbits")
+    parser.add_argument("--integrators", nargs="+", choices=("rk4", "euler"), default=("rk4", "euler"))
+    parser.add_argument("--duration-scale", type=float, default=1.0, help="multiplier of the time of flight")
+    args = parser.parse_args()
+
+    print(table(benchmark(args.integrators, args.duration_scale)))
@@ -0,0 +1,228 @@
+import time
+
+import numpy as np
+
+DURATION = 10 * 24 * 3600
+"""Time of flight covered by the long prediction in seconds"""
+MAX_POINTS = 4000
+"""Maximum number of points, low orbits need short steps and end at this number of points before DURATION,
+a 300 km circular orbit is covered for about 154 h"""
+STEP_TOLERANCE = 1
+"""Maximum estimated position error of one step in metres"""
+VELOCITY_STEP_TOLERANCE = 0.001
+"""Maximum estimated velocity error of one step in m/s"""
+MIN_STEP = 0.1
+"""Shortest step in seconds, a step this short is accepted even if its error is larger than the tolerances"""
+MAX_STEP = 3600
+"""Longest step in seconds, it is used far from Earth and the Moon, where the error estimate allows longer steps"""
+POSITION_TOLERANCE = 1000
+"""Prediction is calculated again when the rocket is farther than this from it, in metres"""
+VELOCITY_TOLERANCE = 1
+"""or when the velocity of the rocket differs from it more than this, in m/s"""
+REFRESH = 0.25
+"""Prediction is calculated again when this part of DURATION has passed, so it always looks far enough"""
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1])
+A = np.array([[0, 0, 0, 0, 0, 0],
+              [1 / 5, 0, 0, 0, 0, 0],
+              [3 / 40, 9 / 40, 0, 0, 0, 0],
+              [44 / 45, -56 / 15, 32 / 9, 0, 0, 0],
+              [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729, 0, 0],
+              [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656, 0],
+              [35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84]])
+"""Dormand-Prince 5(4) coefficients, the last row gives the fifth order solution"""
+E = np.array([71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+"""Difference between the fifth and the fourth order solutions"""
+
+
+def interpolate(first, second, first_time, second_time, moment):
+    """
+    Returns state between two points of a trajectory with cubic Hermite interpolation of the position, it is
+    accurate with long steps, because velocities at both points are used
+    :param first: [x, y, vx, vy] array of the first point
+    :param second: [x, y, vx, vy] array of the second point
+    :param first_time: time of the first point
+    :param second_time: time of the second point
+    :param moment: time between them
+    :return: [x, y, vx, vy] array
+    """
+    step = second_time - first_time
+    s = (moment - first_time) / step
+    p_0, v_0, p_1, v_1 = first[:2], first[2:] * step, second[:2], second[2:] * step
+    position = (2 * s ** 3 - 3 * s ** 2 + 1) * p_0 + (s ** 3 - 2 * s ** 2 + s) * v_0 + \
+        (3 * s ** 2 - 2 * s ** 3) * p_1 + (s ** 3 - s ** 2) * v_1
+    velocity = ((6 * s ** 2 - 6 * s) * p_0 + (3 * s ** 2 - 4 * s + 1) * v_0 + (6 * s - 6 * s ** 2) * p_1 +
+                (3 * s ** 2 - 2 * s) * v_1) / step
+    return np.concatenate([position, velocity])
+
+
+class LongPrediction:
+    """
+    Free flight of the rocket for days ahead with Dormand-Prince steps, which are chosen by the error estimate:
+    minutes far from Earth and the Moon and seconds near periapsis and near the Moon, so DURATION fits into
+    MAX_POINTS. The closest approach to the Moon is found between the points. Like the budgeted predicative orbit,
+    it is extended within a time budget and calculated from the beginning only when the trajectory changes
+    """
+
+    def __init__(self, duration=DURATION, max_points=MAX_POINTS):
+        """
+        Initializing empty prediction
+        :param duration: time of flight to predict in seconds
+        :param max_points: maximum number of points
+        """
+        self.duration = duration
+        self.orbit = np.zeros((max_points, 4))
+        self.times = np.zeros(max_points)
+        self.count = 0
+        self.step = 0.0
+        self.derivative = None
+        self.contact = None
+        self.complete = False
+        self.closest_time = None
+        self.closest_distance = np.inf
+        self.closest_position = None
+        self.moon_position = None
+
+    def restart(self, engine):
+        """
+        Starting prediction from the current state of the rocket
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        """
+        parameters = engine.rocket_parameters
+        self.orbit[0] = parameters.parameters
+        self.times[0] = parameters.current_time
+        self.count = 1
+        self.step = 10.0
+        self.derivative = engine.calc_differential_euler(self.orbit[0], self.times[0])
+        self.contact = None
+        self.complete = False
+        self.closest_time = None
+        self.closest_distance = np.inf
+        self.closest_position = None
+        self.moon_position = None
+        self.check_moon(engine, 0)
+
+    def changed(self, engine):
+        """
+        Checking whether the prediction must be calculated from the beginning: the engine works, the current time is
+        not inside the prediction, REFRESH of the duration has passed or the rocket is not on the predicted path
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        """
+        parameters = engine.rocket_parameters
+        current_time = parameters.current_time
+        if self.count < 2 or engine.calc_acceleration_engine().any():
+            return True
+        if not self.times[0] <= current_time < self.times[self.count - 1] or \
+                current_time > self.times[0] + self.duration * REFRESH:
+            return True
+        i = int(np.searchsorted(self.times[:self.count], current_time, side="right"))
+        difference = parameters.parameters - interpolate(self.orbit[i - 1], self.orbit[i], self.times[i - 1],
+                                                         self.times[i], current_time)
+        return np.hypot(*difference[:2]) > POSITION_TOLERANCE or np.hypot(*difference[2:]) > VELOCITY_TOLERANCE
+
+    def moon_state(self, engine, moment):
+        """
+        Returns position and velocity of the Moon
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param moment: time
+        """
+        position = engine.calc_moon_position(moment)
+        return position, np.array([-position[1], position[0]]) / engine.constants.moon_period
+
+    def approach_rate(self, engine, state, moment):
+        """
+        Returns scalar product of the position and the velocity relative to the Moon, it is negative while the
+        rocket approaches the Moon
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param state: [x, y, vx, vy] array
+        :param moment: time
+        """
+        position, velocity = self.moon_state(engine, moment)
+        return np.dot(state[:2] - position, state[2:] - velocity)
+
+    def check_moon(self, engine, i):
+        """
+        Updating the closest approach to the Moon with point i and with the minimum of the distance between points
+        i - 1 and i, which is found by bisection of approach_rate on the interpolated trajectory
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param i: number of the new point
+        """
+        candidates = [self.times[i]]
+        if i > 0 and self.approach_rate(engine, self.orbit[i - 1], self.times[i - 1]) < 0 <= \
+                self.approach_rate(engine, self.orbit[i], self.times[i]):
+            low, high = self.times[i - 1], self.times[i]
+            for _ in range(40):
+                middle = (low + high) / 2
+                state = interpolate(self.orbit[i - 1], self.orbit[i], self.times[i - 1], self.times[i], middle)
+                if self.approach_rate(engine, state, middle) < 0:
+                    low = middle
+                else:
+                    high = middle
+            candidates.append((low + high) / 2)
+        for moment in candidates:
+            state = self.orbit[i] if moment == self.times[i] else \
+                interpolate(self.orbit[i - 1], self.orbit[i], self.times[i - 1], self.times[i], moment)
+            moon = engine.calc_moon_position(moment)
+            distance = np.hypot(*(state[:2] - moon))
+            if distance < self.closest_distance:
+                self.closest_distance = distance
+                self.closest_time = moment
+                self.closest_position = state[:2].copy()
+                self.moon_position = moon
+
+    def extend(self, engine, deadline=None):
+        """
+        Adding points with adaptive steps until the prediction is complete or the deadline passes
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param deadline: value of time.perf_counter, after which no new step is started, None for no limit
+        """
+        stages = np.zeros((7, 4))
+        end_time = self.times[0] + self.duration
+        while not self.complete and (deadline is None or time.perf_counter() < deadline):
+            i = self.count
+            state, moment = self.orbit[i - 1], self.times[i - 1]
+            step = min(self.step, end_time - moment)
+            stages[0] = self.derivative
+            for stage in range(1, 7):
+                stages[stage] = engine.calc_differential_euler(state + step * (A[stage, :stage] @ stages[:stage]),
+                                                               moment + C[stage] * step)
+            error = step * (E @ stages)
+            ratio = max(np.hypot(*error[:2]) / STEP_TOLERANCE, np.hypot(*error[2:]) / VELOCITY_STEP_TOLERANCE)
+            self.step = min(max(step * min(5.0, max(0.2, 0.9 * max(ratio, 1e-10) ** -0.2)), MIN_STEP), MAX_STEP)
+            if ratio > 1 and step > MIN_STEP:
+                continue
+
+            self.orbit[i] = state + step * (A[6] @ stages[:6])
+            self.times[i] = moment + step
+            self.derivative = stages[6].copy()
+            self.count += 1
+            body = engine.detect_contacts(self.orbit[i:i + 1, :2], self.times[i:i + 1])[0]
+            if body >= 0:
+                self.contact = engine.calc_contact(self.orbit[i - 1], moment, self.orbit[i], self.times[i], body)
+                self.orbit[i] = self.contact.parameters
+                self.times[i] = self.contact.time
+            self.check_moon(engine, i)
+            self.complete = body >= 0 or self.times[i] >= end_time or self.count == len(self.times)
+
+    def update(self, engine, budget=None):
+        """
+        Calculating the prediction from the beginning if it changed and extending it, while the rocket stands on a
+        surface the prediction is empty
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param budget: time in seconds, which the call may spend on new points, None for no limit
+        """
+        if engine.rocket_parameters.landed_flag:
+            self.count = 0
+            self.contact = self.closest_time = None
+            return
+        if self.changed(engine):
+            self.restart(engine)
+        self.extend(engine, None if budget is None else time.perf_counter() + budget)
+
+    def trajectory(self, current_time):
+        """
+        Returns points of the prediction after a moment
+        :param current_time: time of the first returned point
+        :return: points [n, 4], times [n]
+        """
+        i = int(np.searchsorted(self.times[:self.count], current_time, side="right"))
+        return self.orbit[i:self.count], self.times[i:self.count]
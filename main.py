@@ -1,43 +1,49 @@
-import sandbox_menu
-import sandbox
-import main_menu
-import draw_screen
-import pygame
-import trajectory_calculation
-
-pygame.init()
-FPS = 20
-clock = pygame.time.Clock()
-finished = False
-start_ticks = pygame.time.get_ticks()
-flag_start = 0
-flag_menu = "main menu"
-
-window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-pygame.display.update()
-window_width, window_height = pygame.display.get_surface().get_size()
-
-rocket = sandbox.Rocket()
+import sys
+import time
 
-Rocket_surface = draw_screen.RocketView(window_width, window_height, rocket)
-Space_surface = draw_screen.SpaceView(window_width, window_height, rocket)
-Parameters_surface = draw_screen.ParametersView(window_width, window_height, rocket)
-Views = [Rocket_surface, Space_surface, Parameters_surface]
+program_start = time.perf_counter()
 
-rocket_engine = None
+import assets
+import pygame
 
-flag_turn = "None"
-flag_power = "None"
-part_size = ["engine", 0]
+assets.timings.append(["import pygame", time.perf_counter() - program_start, "MainThread"])
+STARTUP_PROFILE = "--startup-profile" in sys.argv
+"""Run with --startup-profile to print where startup time is spent"""
+RECORD_FILE = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv[:-1] else None
+"""Run with --record file.npz to record the flight, replay it with recording.py"""
+TELEMETRY = "--telemetry" in sys.argv
+"""Run with --telemetry to send the state of the flight to UDP port telemetry.PORT, print it with telemetry.py"""
+PHYSICS_PROCESS = "--physics-process" in sys.argv
+"""Run with --physics-process to calculate the flight in a separate process, --record is ignored then"""
+
+PHYSICS_RATE = 20
+"""Number of physics steps per second of real time"""
+MAX_STEPS_PER_FRAME = 5
+"""Maximum number of physics steps in one frame, when frames are slower the rest of the lag is dropped, so the
+simulated time runs slower than real time instead of the game freezing"""
+PREDICTION_BUDGET = 0.003
+"""Time in seconds spent on the predicative orbit in one frame, long orbits are extended in the next frames"""
+
+
+def display_refresh_rate():
+    """
+    Returns refresh rate of the monitor, 60 if it can not be determined
+    """
+    if hasattr(pygame.display, "get_desktop_refresh_rates"):
+        rates = pygame.display.get_desktop_refresh_rates()
+        if rates and rates[0] > 0:
+            return rates[0]
+    return 60
 
 
-def draw_everything(engine):
+def draw_everything(engine, alpha):
     """
     Drawing play menu, which include 3 views
     :param engine: object of class PhysicsEngine from trajectory_calculation
+    :param alpha: position of the frame between the two last physics steps, from 0 to 1
     """
     for view in Views:
-        view.set_engine(engine)
+        view.set_engine(engine, alpha)
         view.draw()
         window.blit(view.surface, (view.x, view.y))
 
@@ -45,55 +51,91 @@ def draw_everything(engine):
 def menu_type(flag, obj, part_type):
     """
     Function, that determines which menu to show. If flag = main menu or sandbox menu, required menu is shown
-    :param flag: type of menu: main menu, sandbox menu, play menu
+    :param flag: type of menu: main menu, sandbox menu, play menu, credits
     :param obj: rocket
     :param part_type: array of a part of a rocket, which is being selected in this particular moment, and its width
     :return: flag, part_type
     """
     if flag == "main menu":
         flag = main_menu.main_menu(window, flag)
+    elif flag == "credits":
+        flag = main_menu.credits_menu(window, flag, events)
     elif flag == "sandbox menu":
         flag, obj, part_type = sandbox_menu.sandbox(window, flag, window_width, window_height, obj, events, part_type)
 
     return flag, part_type
 
 
-def play_menu(obj, engine, start):
+def play_menu(obj, engine, start, turn, power, frame_time):
     """
-    Function, which initializes, processes rocket parameters and calculate new step
+    Function, which initializes, processes rocket parameters and calculates new steps. Physics runs with fixed rate
+    PHYSICS_RATE independently of FPS, the views are drawn in between the two last steps. Controls are applied by
+    Flight from recording at the beginning of ticks, so the flight can be recorded. With --physics-process the steps
+    are calculated by PhysicsProcess and the views are drawn from its last published state. Otherwise the predicative
+    orbit is extended once per frame within PREDICTION_BUDGET
     :param obj: object of class Rocket from sandbox
     :param engine: object of class PhysicsEngine from trajectory_calculation
     :param start: flag, that shows whether rocket was launched
+    :param turn: flag that shows whether right or left arrow is held
+    :param power: flag that shows whether Shift(increase speed) or CTRL(reduce speed) is held
+    :param frame_time: real time passed since the previous frame in seconds
     :return: obj, engine
     """
-    if engine is None:
-        param = [6.37e6, 0, 0, 0]
-        initial_parameters = obj.get_active_parameters()
-        engine = trajectory_calculation.PhysicsEngine(*initial_parameters, param)
-        engine.switch_engine(True, 0)
-        engine.set_rocket_direction(0)
+    global physics_lag, scene, flight, history, publisher
 
-    if start == 1:
-        engine.process_step()
-
-    draw_everything(engine)
+    if engine is None:
+        if PHYSICS_PROCESS:
+            flight = physics_process.PhysicsProcess(obj, PHYSICS_RATE)
+        else:
+            flight = recording.Flight(obj, record=RECORD_FILE is not None, predict=False)
+            flight.engine.constants.prediction_budget = PREDICTION_BUDGET
+            history = rewind.History(flight)
+        engine = flight.engine
+        physics_lag = 0.0
+        scene = flight.scene
+        Space_surface.set_scene(scene)
+        if TELEMETRY and publisher is None:
+            publisher = telemetry.TelemetryPublisher()
+            publisher.start()
+
+    if PHYSICS_PROCESS:
+        tick = flight.tick
+        alpha = flight.update(start, turn, power)
+        if publisher is not None and flight.tick != tick:
+            publisher.publish(engine, obj)
+        draw_everything(engine, alpha)
+        return obj, engine
+
+    if paused:
+        engine.calc_predicative_orbit()
+        draw_everything(engine, 1.0)
+        return obj, engine
+
+    physics_lag += frame_time
+    steps = 0
+    while physics_lag >= 1 / PHYSICS_RATE and not engine.rocket_parameters.collision_flag:
+        physics_lag -= 1 / PHYSICS_RATE
+        flight.step(start, turn, power)
+        if publisher is not None:
+            publisher.publish(engine, obj)
+        steps += 1
+        if steps == MAX_STEPS_PER_FRAME:
+            physics_lag = 0.0
+
+    engine.calc_predicative_orbit()
+    draw_everything(engine, min(physics_lag * PHYSICS_RATE, 1.0))
 
     return obj, engine
 
 
-def rocket_direction(eve, turn, engine):
+def rocket_direction(eve, turn):
     """
-        Analyzing keyboard inputs and controlling rocket direction
+        Analyzing keyboard inputs and controlling rocket direction, held keys are turned into controls by
+        recording.Flight.step (PhysicsProcess.update with --physics-process) and applied in Flight.process_tick
         :param eve: events
         :param turn: flag that shows whether right or left arrow was pressed
-        :param engine: object of class PhysicsEngine from trajectory_calculation
-        :return: turn, engine
+        :return: turn
         """
-    if turn == "right":
-        rocket.angle -= 1
-    if turn == "left":
-        rocket.angle += 1
-
     for inc in eve:
         if (turn == "right") and (inc.type == pygame.KEYUP) and (inc.key == pygame.K_RIGHT):
             turn = "None"
@@ -103,26 +145,21 @@ def rocket_direction(eve, turn, engine):
         if inc.type == pygame.KEYDOWN:
             if inc.key == pygame.K_RIGHT:
                 turn = "right"
-                rocket.angle -= 1
+                flight.control(recording.NUDGE_RIGHT)
             if inc.key == pygame.K_LEFT:
                 turn = "left"
-                rocket.angle += 1
+                flight.control(recording.NUDGE_LEFT)
 
-    engine.set_rocket_direction(trajectory_calculation.np.deg2rad(rocket.angle + 90))
-    return turn, engine
+    return turn
 
 
 def rocket_power(eve, power):
     """
-    Analyzing keyboard inputs and controlling rocket power
+    Analyzing keyboard inputs and controlling rocket power, held keys are turned into controls by
+    recording.Flight.step (PhysicsProcess.update with --physics-process) and applied in Flight.process_tick
     :param eve: events
     :param power: flag that shows whether Shift(increase speed) or CTRL(reduce speed) was pressed
     """
-    if (power == "increase") and (rocket_engine.rocket_parameters.engine_power < 100):
-        rocket_engine.rocket_parameters.engine_power += 2
-    if (power == "reduce") and (rocket_engine.rocket_parameters.engine_power > 0):
-        rocket_engine.rocket_parameters.engine_power -= 2
-
     for inc in eve:
         if (power == "increase") and (inc.type == pygame.KEYUP) and (inc.key == pygame.K_LSHIFT):
             power = "None"
@@ -133,16 +170,49 @@ def rocket_power(eve, power):
             if inc.key == pygame.K_LSHIFT:
                 if rocket_engine.rocket_parameters.engine_power < 100:
                     power = "increase"
-                    rocket_engine.rocket_parameters.engine_power += 2
+                    flight.control(recording.STEP_UP)
             if inc.key == pygame.K_LCTRL:
                 if rocket_engine.rocket_parameters.engine_power > 0:
                     power = "reduce"
-                    rocket_engine.rocket_parameters.engine_power -= 2
+                    flight.control(recording.STEP_DOWN)
 
     return power
 
 
-def displaying_menu(menu, part_type, obj, engine, start, turn, power, eve, finish):
+def scene_control(eve):
+    """
+    Analyzing keyboard inputs: T drops a test target at the position of the rocket,
+    Tab switches control to the next vehicle
+    :param eve: events
+    """
+    for inc in eve:
+        if inc.type == pygame.KEYDOWN:
+            if inc.key == pygame.K_t:
+                flight.control(recording.DROP_TARGET)
+                Rocket_surface.emit_debris()
+            if inc.key == pygame.K_TAB:
+                flight.control(recording.NEXT_VEHICLE)
+
+
+def rewind_control(eve):
+    """
+    Analyzing keyboard inputs: P pauses and resumes the flight, while it is paused comma moves it back and period
+    moves it forward by rewind.REWIND_STEP ticks. The flight continues from the shown tick
+    :param eve: events
+    """
+    global paused, physics_lag
+    for inc in eve:
+        if inc.type == pygame.KEYDOWN and history is not None:
+            if inc.key == pygame.K_p:
+                paused = not paused
+                physics_lag = 0.0
+            if paused and inc.key in (pygame.K_COMMA, pygame.K_PERIOD):
+                shift = -rewind.REWIND_STEP if inc.key == pygame.K_COMMA else rewind.REWIND_STEP
+                history.seek(flight.tick + shift)
+                Space_surface.trail.clear()
+
+
+def displaying_menu(menu, part_type, obj, engine, start, turn, power, eve, finish, frame_time):
     """
     Function, which is responsible for everything related to menus
     :param menu: type of menu: main menu, sandbox menu, play menu
@@ -154,43 +224,112 @@ def displaying_menu(menu, part_type, obj, engine, start, turn, power, eve, finis
     :param power: flag that shows whether Shift(increase speed) or CTRL(reduce speed) was pressed
     :param eve: events
     :param finish: finished flag
+    :param frame_time: real time passed since the previous frame in seconds
     :return: menu, part_type, obj, engine, start, turn, power, finish
     """
     menu, part_type = menu_type(menu, obj, part_type)
 
     if menu == "play menu":
-        obj, engine = play_menu(obj, engine, start)
+        Space_surface.handle_events(eve)
+        obj, engine = play_menu(obj, engine, start, turn, power, frame_time)
         if engine.rocket_parameters.collision_flag:
             finish = True
         else:
-            turn, engine = rocket_direction(eve, turn, engine)
+            turn = rocket_direction(eve, turn)
             power = rocket_power(eve, power)
+            scene_control(eve)
+            rewind_control(eve)
 
     return menu, part_type, obj, engine, start, turn, power, finish
 
 
-while not finished:
-    clock.tick(FPS)
-    seconds = (pygame.time.get_ticks() - start_ticks) / 1000
-
-    events = pygame.event.get()
-
-    flag_menu, part_size, rocket, rocket_engine, flag_start, flag_turn, flag_power, finished = displaying_menu(
-        flag_menu,
-        part_size, rocket,
-        rocket_engine,
-        flag_start,
-        flag_turn,
-        flag_power, events, finished)
-
-    for event in events:
-        if event.type == pygame.QUIT:
-            finished = True
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                finished = True
-            if event.key == pygame.K_SPACE and flag_menu == "play menu":
-                flag_start = 1
+if __name__ == "__main__":
+    pygame.display.init()
+    pygame.font.init()
+    window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    window_width, window_height = pygame.display.get_surface().get_size()
+    loading = assets.font(None, 60).render("Loading...", True, [255, 255, 255])
+    window.blit(loading, loading.get_rect(center=(window_width / 2, window_height / 2)))
     pygame.display.update()
-
-pygame.quit()
+    first_frame_time = time.perf_counter() - program_start
+
+    sandbox_menu = assets.timed_import("sandbox_menu")
+    sandbox = assets.timed_import("sandbox")
+    main_menu = assets.timed_import("main_menu")
+    draw_screen = assets.timed_import("draw_screen")
+    recording = assets.timed_import("recording")
+    rewind = assets.timed_import("rewind")
+    telemetry = assets.timed_import("telemetry") if TELEMETRY else None
+    physics_process = assets.timed_import("physics_process") if PHYSICS_PROCESS else None
+
+    assets.load_in_background([main_menu.BACKGROUND, "textures/menu/Play Rect.png",
+                               "textures/menu/Options Rect.png", "textures/menu/Quit Rect.png",
+                               sandbox_menu.BACKGROUND, draw_screen.STARS, sandbox.FIRE,
+                               *sandbox_menu.parts.load_catalog().texture_files],
+                              [main_menu.start_menu_music])
+
+    clock = pygame.time.Clock()
+    finished = False
+    start_ticks = pygame.time.get_ticks()
+    flag_start = 0
+    flag_menu = "main menu"
+    menu_frame_time = None
+
+    FPS = display_refresh_rate()
+    physics_lag = 0.0
+
+    rocket = sandbox.Rocket()
+
+    Rocket_surface = draw_screen.RocketView(window_width, window_height, rocket)
+    Space_surface = draw_screen.SpaceView(window_width, window_height, rocket)
+    Parameters_surface = draw_screen.ParametersView(window_width, window_height, rocket)
+    Views = [Rocket_surface, Space_surface, Parameters_surface]
+
+    rocket_engine = None
+    scene = None
+    flight = None
+    history = None
+    paused = False
+    publisher = None
+
+    flag_turn = "None"
+    flag_power = "None"
+    part_size = ["engine", 0]
+
+    while not finished:
+        frame_seconds = clock.tick(FPS) / 1000
+        seconds = (pygame.time.get_ticks() - start_ticks) / 1000
+
+        events = pygame.event.get()
+
+        flag_menu, part_size, rocket, rocket_engine, flag_start, flag_turn, flag_power, finished = displaying_menu(
+            flag_menu,
+            part_size, rocket,
+            rocket_engine,
+            flag_start,
+            flag_turn,
+            flag_power, events, finished, frame_seconds)
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                finished = True
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    finished = True
+                if event.key == pygame.K_SPACE and flag_menu == "play menu":
+                    flag_start = 1
+        pygame.display.update()
+
+        if STARTUP_PROFILE and menu_frame_time is None:
+            menu_frame_time = time.perf_counter() - program_start
+            assets.loader.join()
+            assets.report([["time to first frame", first_frame_time], ["time to main menu", menu_frame_time],
+                           ["background loading finished", time.perf_counter() - program_start]])
+
+    if publisher is not None:
+        publisher.close()
+    if flight is not None and PHYSICS_PROCESS:
+        flight.close()
+    elif flight is not None and RECORD_FILE is not None:
+        flight.save(RECORD_FILE)
+    pygame.quit()
@@ -1,13 +1,18 @@
 import pygame
+import queue
 import sys
-import cv2
+import threading
+import time
 
-BG = pygame.image.load("textures/menu/background.png")
-"""Uploads background picture"""
-pygame.mixer.music.load("textures/music/Star_finder.mp3")
-"""Uploads background music"""
-pygame.mixer.music.play(loops=0)
-"""Plays the music"""
+import assets
+
+BACKGROUND = "textures/menu/background.png"
+MENU_MUSIC = "textures/music/Star_finder.mp3"
+menu_music = True
+"""Whether background music of the main menu should still be started"""
+VIDEO_QUEUE_SIZE = 16
+video_player = None
+"""Credits video, which is being played"""
 
 
 class Button:
@@ -74,34 +79,131 @@ def get_font(size):
     :param size: size of font
     :return: pygame.font.Font("textures/menu/font.ttf", size)
     """
-    return pygame.font.Font("textures/menu/font.ttf", size)
+    return assets.font("textures/menu/font.ttf", size)
 
 
-def play_video():
+class VideoPlayer(threading.Thread):
     """
-    When CREDITS is clicked plays video.
+    Decodes video in a background thread into a bounded queue of frames, which are shown by the main loop
     """
-    file_name = "textures/credits/sw-3000.mp4"
-    window_name = "window"
-    inter_frame_wait_ms = 5
 
-    video = cv2.VideoCapture(file_name)
-    cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
-    cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    def __init__(self, file_name, size, queue_size=VIDEO_QUEUE_SIZE):
+        """
+        Initializing video player
+        :param file_name: path to the video
+        :param size: (width, height) of the screen, frames are scaled to it while decoding
+        :param queue_size: maximum number of decoded frames waiting to be shown
+        """
+        import cv2
+
+        threading.Thread.__init__(self, daemon=True)
+        self.video = cv2.VideoCapture(file_name)
+        self.fps = self.video.get(cv2.CAP_PROP_FPS) or 25
+        self.size = (int(size[0]), int(size[1]))
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.start_time = None
+        self.frame_number = -1
+        self.surface = None
+        self.finished = False
+
+    def put(self, frame):
+        """
+        Adding frame to the queue, waits while the queue is full unless the player is stopped
+        :param frame: decoded frame or None as the end of the video
+        """
+        while not self.stopped.is_set():
+            try:
+                self.frames.put(frame, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def run(self):
+        """
+        Decoding frames, converting them to RGB and scaling to the screen size
+        """
+        import cv2
 
-    while True:
-        ret, frame = video.read()
-        if not ret:
-            print("Reached end of video, exiting.")
-            break
+        while not self.stopped.is_set():
+            ret, frame = self.video.read()
+            if not ret:
+                break
+            self.put(cv2.cvtColor(cv2.resize(frame, self.size), cv2.COLOR_BGR2RGB))
+        self.put(None)
+        self.video.release()
 
-        cv2.imshow(window_name, frame)
-        if cv2.waitKey(inter_frame_wait_ms) & 0x7F == ord('q'):
-            print("Exit requested.")
-            break
+    def present(self, screen):
+        """
+        Showing the frame, which corresponds to the time passed since the start, with native frame rate of the video
+        :param screen: screen
+        :return: False when the video is over
+        """
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        due_frame = int((time.perf_counter() - self.start_time) * self.fps)
+        while self.frame_number < due_frame and not self.finished:
+            try:
+                frame = self.frames.get_nowait()
+            except queue.Empty:
+                break
+            if frame is None:
+                self.finished = True
+            else:
+                self.frame_number += 1
+                self.surface = pygame.image.frombuffer(frame, self.size, "RGB")
+        if self.surface is not None:
+            screen.blit(self.surface, (0, 0))
+        return not self.finished
 
-    video.release()
-    cv2.destroyAllWindows()
+    def stop(self):
+        """
+        Stopping decoding
+        """
+        self.stopped.set()
+        self.join()
+
+
+def start_menu_music():
+    """
+    Starting background music of the main menu, unless the main menu was already left. Used by the loading thread
+    """
+    with assets.lock:
+        if menu_music:
+            with assets.measure(MENU_MUSIC):
+                assets.mixer().music.load(MENU_MUSIC)
+            assets.mixer().music.play(loops=0)
+
+
+def play_video(screen):
+    """
+    When CREDITS is clicked starts playing video.
+    :param screen: screen
+    """
+    global video_player
+    video_player = VideoPlayer("textures/credits/sw-3000.mp4", screen.get_size())
+    video_player.start()
+
+
+def credits_menu(screen, menu, events):
+    """
+    Showing credits video, press Q to return to the main menu
+    :param screen: screen
+    :param menu: type of menu: main menu, sandbox menu, play menu, credits
+    :param events: events
+    :return: menu
+    """
+    global video_player
+    playing = video_player.present(screen)
+    for event in events:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_q:
+            playing = False
+    if not playing:
+        video_player.stop()
+        video_player = None
+        assets.mixer().music.stop()
+        menu = "main menu"
+    return menu
 
 
 def buttons_define(screen, coef_w, coef_h):
@@ -115,13 +217,13 @@ def buttons_define(screen, coef_w, coef_h):
     rect = text.get_rect(center=(960 * coef_w, 150 * coef_h))
     screen.blit(text, rect)
 
-    play_button = Button(image=pygame.image.load("textures/menu/Play Rect.png"),
+    play_button = Button(image=assets.image("textures/menu/Play Rect.png"),
                          pos=(960 * coef_w, 375 * coef_h),
                          text_input="PLAY", font=get_font(75), base_color="#d7fcd4", hovering_color="White")
-    credits_button = Button(image=pygame.image.load("textures/menu/Options Rect.png"),
+    credits_button = Button(image=assets.image("textures/menu/Options Rect.png"),
                             pos=(960 * coef_w, 600 * coef_h),
                             text_input="CREDITS", font=get_font(75), base_color="#d7fcd4", hovering_color="White")
-    quit_button = Button(image=pygame.image.load("textures/menu/Quit Rect.png"),
+    quit_button = Button(image=assets.image("textures/menu/Quit Rect.png"),
                          pos=(960 * coef_w, 825 * coef_h),
                          text_input="QUIT", font=get_font(75), base_color="#d7fcd4", hovering_color="White")
     return play_button, credits_button, quit_button
@@ -131,9 +233,11 @@ def main_menu(screen, menu):
     """
     Main function of main_menu.py.
     :param screen: screen
-    :param menu: type of menu: main menu, sandbox menu, play menu
+    :param menu: type of menu: main menu, sandbox menu, play menu, credits
     """
-    screen.blit(BG, (0, 0))
+    global menu_music
+
+    screen.blit(assets.image(BACKGROUND), (0, 0))
     coefficient_w = screen.get_size()[0] / 1920
     coefficient_h = screen.get_size()[1] / 1080
     menu_mouse_pos = pygame.mouse.get_pos()
@@ -150,14 +254,18 @@ def main_menu(screen, menu):
             sys.exit()
         if event.type == pygame.MOUSEBUTTONDOWN:
             if play_button.check_for_input(menu_mouse_pos):
-                pygame.mixer.music.stop()
+                with assets.lock:
+                    menu_music = False
+                    assets.mixer().music.stop()
                 menu = "sandbox menu"
                 screen.fill((0, 0, 0, 0))
             if credits_button.check_for_input(menu_mouse_pos):
-                pygame.mixer.music.load("textures/music/credits.mp3")
-                pygame.mixer.music.play(loops=0)
-                play_video()
-                pygame.mixer.music.stop()
+                with assets.lock:
+                    menu_music = False
+                    assets.mixer().music.load("textures/music/credits.mp3")
+                    assets.mixer().music.play(loops=0)
+                play_video(screen)
+                menu = "credits"
             if quit_button.check_for_input(menu_mouse_pos):
                 pygame.quit()
                 sys.exit()
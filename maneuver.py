@@ -0,0 +1,182 @@
+import numpy as np
+
+import trajectory_calculation
+
+POSITION_TOLERANCE = 1000
+"""Node trajectory is calculated again when the point of the node moves more than this, in metres"""
+VELOCITY_TOLERANCE = 1
+"""or when the velocity at the point of the node changes more than this, in m/s"""
+
+
+class ManeuverNode:
+    """
+    Planned impulsive burn at a point of the predicted trajectory. Trajectory after the burn is cached and
+    calculated again only when the node is changed or the trajectory before the node moves
+    """
+
+    def __init__(self, time, prograde=0.0, radial=0.0):
+        """
+        Initializing maneuver node
+        :param time: time of the burn
+        :param prograde: delta-v along the velocity in m/s
+        :param radial: delta-v perpendicular to the velocity, away from Earth, in m/s
+        """
+        self.time = time
+        self.prograde = prograde
+        self.radial = radial
+        self.key = None
+        self.base_state = None
+        self.state = None
+        self.orbit = np.ndarray(shape=(0, 4), dtype=float)
+        self.times = np.ndarray(shape=0, dtype=float)
+        self.count = 0
+        self.contact = None
+        self.elements = None
+
+    def delta_v(self):
+        """
+        Returns delta-v of the burn in m/s
+        """
+        return np.hypot(self.prograde, self.radial)
+
+    def burn_vector(self, state):
+        """
+        Returns delta-v of the burn as [dvx, dvy] vector
+        :param state: [x, y, vx, vy] array of the rocket state before the burn
+        """
+        speed = np.linalg.norm(state[2:])
+        prograde = state[2:] / speed if speed > 0 else state[:2] / np.linalg.norm(state[:2])
+        radial = np.array([-prograde[1], prograde[0]])
+        if np.dot(radial, state[:2]) < 0:
+            radial = -radial
+        return self.prograde * prograde + self.radial * radial
+
+    def needs_update(self, base_state):
+        """
+        Checking whether the trajectory after the node must be calculated again
+        :param base_state: [x, y, vx, vy] array of the rocket state before the burn
+        """
+        return self.key != (self.time, self.prograde, self.radial) or self.base_state is None or \
+            np.linalg.norm(base_state[:2] - self.base_state[:2]) > POSITION_TOLERANCE or \
+            np.linalg.norm(base_state[2:] - self.base_state[2:]) > VELOCITY_TOLERANCE
+
+    def update(self, engine, base_state):
+        """
+        Calculating trajectory after the burn with the same method as the predicative orbit
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param base_state: [x, y, vx, vy] array of the rocket state before the burn
+        """
+        log_size = engine.constants.log_size
+        if len(self.orbit) < log_size:
+            self.orbit = np.ndarray(shape=(log_size, 4), dtype=float)
+            self.times = np.ndarray(shape=log_size, dtype=float)
+        self.key = (self.time, self.prograde, self.radial)
+        self.base_state = base_state.copy()
+        self.state = base_state.copy()
+        self.state[2:] += self.burn_vector(base_state)
+        self.orbit[0] = self.state
+        self.times[0] = self.time
+        self.count, self.contact = engine.propagate(self.orbit, self.times, log_size)
+        self.elements = trajectory_calculation.OrbitalElements(self.state, engine.constants.mu_Earth,
+                                                               engine.constants.rad_Earth, self.time)
+
+    def trajectory(self):
+        """
+        Returns points [n, 4] and times [n] of the trajectory after the burn
+        """
+        return self.orbit[:self.count], self.times[:self.count]
+
+
+def state_at(orbit, times, time):
+    """
+    Returns rocket state at a moment, interpolated between the points of a trajectory
+    :param orbit: [n, 4] array of trajectory points
+    :param times: [n] array of times of the points
+    :param time: time, which is inside the trajectory
+    """
+    i = min(max(int(np.searchsorted(times, time)), 1), len(times) - 1)
+    fraction = (time - times[i - 1]) / (times[i] - times[i - 1])
+    return orbit[i - 1] + (orbit[i] - orbit[i - 1]) * fraction
+
+
+class ManeuverPlanner:
+    """
+    Planned burns of the controlled rocket. Every node lies on the trajectory after the previous node, the first
+    one lies on the predicative orbit. A changed node is calculated again together with the nodes after it, the
+    nodes before it are not touched
+    """
+
+    def __init__(self):
+        """
+        Initializing planner without nodes
+        """
+        self.nodes = []
+        self.selected = None
+
+    def base_trajectory(self, engine, i):
+        """
+        Returns trajectory, on which a node lies
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param i: number of the node, len(nodes) for the trajectory after the last node
+        :return: points [n, 4], times [n]
+        """
+        if i == 0:
+            return engine.rocket_parameters.predictive_orbit, engine.rocket_parameters.predictive_times
+        return self.nodes[i - 1].trajectory()
+
+    def add_node(self, engine, time):
+        """
+        Adding node without burn after the last node
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param time: time of the burn, it must be on the trajectory after the last node
+        :return: object of class ManeuverNode
+        """
+        node = ManeuverNode(time)
+        self.nodes.append(node)
+        self.selected = node
+        self.update(engine)
+        return node
+
+    def remove_node(self, node):
+        """
+        Removing node, the nodes after it stay at their times
+        :param node: object of class ManeuverNode
+        """
+        self.nodes.remove(node)
+        self.selected = self.nodes[-1] if self.nodes else None
+
+    def clear(self):
+        """
+        Removing all nodes
+        """
+        self.nodes = []
+        self.selected = None
+
+    def update(self, engine):
+        """
+        Removing passed nodes and nodes, which are not on their trajectories any more, and calculating trajectories
+        of changed nodes and nodes after them. Nodes after the end of a predicative orbit, which is still being
+        extended, are kept
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        """
+        changed = False
+        i = 0
+        while i < len(self.nodes):
+            node = self.nodes[i]
+            orbit, times = self.base_trajectory(engine, i)
+            if i == 0 and len(times) > 0 and node.time <= times[0]:
+                self.remove_node(node)
+                changed = True
+                continue
+            if len(times) < 2 or not times[0] < node.time <= times[-1]:
+                if i == 0 and engine.predicting:
+                    break
+                self.nodes = self.nodes[:i]
+                if self.selected not in self.nodes:
+                    self.selected = self.nodes[-1] if self.nodes else None
+                break
+            base_state = state_at(orbit, times, node.time)
+            if changed or node.needs_update(base_state):
+                node.update(engine, base_state)
+                changed = True
+            i += 1
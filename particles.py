@@ -0,0 +1,114 @@
+import numpy as np
+import pygame
+
+EXHAUST = 0
+SMOKE = 1
+DEBRIS = 2
+RAMPS = [
+    # color at birth, color at death, size in pixels
+    ([255, 240, 120, 255], [200, 40, 0, 0], 4),
+    ([160, 160, 160, 160], [90, 90, 90, 0], 7),
+    ([200, 200, 210, 255], [90, 90, 100, 120], 3),
+]
+AGE_STEPS = 8
+"""Number of age buckets, particles of one bucket are drawn with the same color and size from RAMPS"""
+EMISSION_RATE = 2
+"""Exhaust particles per second per unit of fuel flow (engine power in percents times fuel consumption)"""
+SMOKE_ALTITUDE = 5e4
+"""Altitude in metres, above which exhaust does not produce smoke"""
+
+
+class ParticleSystem:
+    """
+    Pool of particles stored in preallocated arrays. Dead particles go to a free list and are reused,
+    all particles are updated at once and drawn with one blits call
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        Initializing particle system
+        :param capacity: maximum number of alive particles, new particles are not emitted when the pool is full
+        """
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.max_life = np.ones(capacity)
+        self.color = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = np.arange(capacity)
+        self.free_count = capacity
+        self.emission_debt = 0.0
+        self.random = np.random.default_rng()
+        self.sprites = np.empty((len(RAMPS), AGE_STEPS), dtype=object)
+        for ramp, (birth, death, size) in enumerate(RAMPS):
+            for age in range(AGE_STEPS):
+                sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+                sprite.fill([int(b + (d - b) * age / (AGE_STEPS - 1)) for b, d in zip(birth, death)])
+                self.sprites[ramp, age] = sprite
+
+    def emit(self, count, position, velocity, spread, life, color):
+        """
+        Emitting particles from one point
+        :param count: number of particles
+        :param position: [x, y] pixel coordinates of the source
+        :param velocity: [vx, vy] mean velocity in pixels per second
+        :param spread: standard deviation of velocity in pixels per second
+        :param life: mean lifetime in seconds
+        :param color: EXHAUST, SMOKE or DEBRIS
+        """
+        count = min(int(count), self.free_count)
+        if count == 0:
+            return
+        indexes = self.free[self.free_count - count:self.free_count]
+        self.free_count -= count
+        self.position[indexes] = position
+        self.velocity[indexes] = np.asarray(velocity) + self.random.normal(0, spread, (count, 2))
+        self.max_life[indexes] = life * self.random.uniform(0.5, 1.5, count)
+        self.life[indexes] = self.max_life[indexes]
+        self.color[indexes] = color
+        self.alive[indexes] = True
+
+    def emit_engine(self, dt, position, direction, engine_power, fuel_consumption, altitude):
+        """
+        Emitting exhaust and, low in the atmosphere, smoke with the rate proportional to the fuel flow
+        :param dt: time since the previous emission in seconds
+        :param position: [x, y] pixel coordinates of the nozzle
+        :param direction: [x, y] vector of length 1, the direction of the exhaust
+        :param engine_power: engine power in percents
+        :param fuel_consumption: engine characteristic
+        :param altitude: altitude of the rocket in metres
+        """
+        self.emission_debt += EMISSION_RATE * engine_power * fuel_consumption * dt
+        count = int(self.emission_debt)
+        self.emission_debt -= count
+        direction = np.asarray(direction)
+        self.emit(count, position, 250 * direction, 40, 0.4, EXHAUST)
+        if altitude < SMOKE_ALTITUDE:
+            self.emit(count // 4, position + 20 * direction, 80 * direction, 25, 1.5, SMOKE)
+
+    def update(self, dt):
+        """
+        Moving particles and returning dead ones to the free list
+        :param dt: time step in seconds
+        """
+        indexes = np.flatnonzero(self.alive)
+        self.position[indexes] += self.velocity[indexes] * dt
+        self.velocity[indexes] *= 1 - 0.8 * dt
+        self.life[indexes] -= dt
+        dead = indexes[self.life[indexes] <= 0]
+        self.alive[dead] = False
+        self.free[self.free_count:self.free_count + len(dead)] = dead
+        self.free_count += len(dead)
+
+    def draw(self, surface):
+        """
+        Drawing all alive particles
+        :param surface: target surface
+        """
+        indexes = np.flatnonzero(self.alive)
+        if len(indexes) == 0:
+            return
+        age = ((1 - self.life[indexes] / self.max_life[indexes]) * (AGE_STEPS - 1)).astype(int)
+        sprites = self.sprites[self.color[indexes], np.clip(age, 0, AGE_STEPS - 1)]
+        positions = self.position[indexes].astype(int).tolist()
+        surface.blits(zip(sprites, positions), doreturn=False)
@@ -1,3 +1,16 @@
+import json
+import os
+
+import numpy as np
+import pygame
+
+import assets
+
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parts_catalog.json")
+catalogs = {}
+"""Loaded catalogs by file name"""
+
+
 class Entity:
     """
     Just a class whose object will be statically drawn on the rocket
@@ -21,6 +34,7 @@ class Entity:
         self.mass = mass
         self.texture = None
         self.active = 1
+        self.part_id = None
 
     def draw(self):
         """
@@ -81,5 +95,99 @@ class Cabin(Entity):
         self.type = "cabin"
 
 
+class PartsCatalog:
+    """
+    All available parts. Statistics are stored in arrays, one element per part, and indexed by id, type and width
+    """
+
+    def __init__(self, records):
+        """
+        Initializing catalog
+        :param records: list of dicts with fields id, type, texture, size, menu_x and statistics of the part
+        (mass; capacity for fuel tanks; power and consumption for engines)
+        """
+        self.ids = [record["id"] for record in records]
+        self.types = [record["type"] for record in records]
+        self.texture_files = [record["texture"] for record in records]
+        self.width = np.array([record["size"][0] for record in records], dtype=int)
+        self.height = np.array([record["size"][1] for record in records], dtype=int)
+        self.menu_x = np.array([record.get("menu_x", 0) for record in records], dtype=float)
+        self.mass = np.array([record["mass"] for record in records], dtype=float)
+        self.capacity = np.array([record.get("capacity", 0) for record in records], dtype=float)
+        self.power = np.array([record.get("power", 0) for record in records], dtype=float)
+        self.consumption = np.array([record.get("consumption", 0) for record in records], dtype=float)
+
+        self.index = {}
+        self.by_type = {}
+        self.by_width = {}
+        for i, part_id in enumerate(self.ids):
+            if part_id in self.index:
+                raise ValueError(f"Part {part_id} is defined twice")
+            self.index[part_id] = i
+            self.by_type.setdefault(self.types[i], []).append(part_id)
+            self.by_width.setdefault((self.types[i], self.width[i]), []).append(part_id)
+        self.textures = {}
+
+    def of_type(self, part_type):
+        """
+        Returns ids of all parts of a type
+        :param part_type: engine, fueltank or cabin
+        """
+        return self.by_type.get(part_type, [])
+
+    def fitting(self, part_type, width):
+        """
+        Returns ids of parts of a type, which fit a rocket of a particular width
+        :param part_type: engine, fueltank or cabin
+        :param width: width of a rocket
+        """
+        return self.by_width.get((part_type, width), [])
+
+    def create(self, part_id, surface=None, x=0, y=0):
+        """
+        Creating part entity with statistics from the catalog
+        :param part_id: id of the part
+        :param surface: canvas of the rocket
+        :param x: x coordinate of the part on the canvas
+        :param y: y coordinate of the part on the canvas
+        :return: object of class Engine, FuelTank or Cabin
+        """
+        if part_id not in self.index:
+            raise ValueError(f"Unknown part {part_id}")
+        i = self.index[part_id]
+        match self.types[i]:
+            case "engine":
+                part_entity = Engine(surface, power=float(self.power[i]), consumption=float(self.consumption[i]),
+                                     x=x, y=y, mass=float(self.mass[i]))
+            case "fueltank":
+                part_entity = FuelTank(surface, capacity=float(self.capacity[i]), x=x, y=y, mass=float(self.mass[i]))
+            case _:
+                part_entity = Cabin(surface, x=x, y=y, mass=float(self.mass[i]))
+        part_entity.part_id = part_id
+        return part_entity
+
+    def texture(self, part_id):
+        """
+        Returns texture of the part scaled to its size. Every texture is loaded only once
+        :param part_id: id of the part
+        """
+        if part_id not in self.textures:
+            i = self.index[part_id]
+            self.textures[part_id] = pygame.transform.scale(assets.image(self.texture_files[i]),
+                                                            (int(self.width[i]), int(self.height[i])))
+        return self.textures[part_id]
+
+
+def load_catalog(file_name=CATALOG_FILE):
+    """
+    Returns catalog of parts, the file is read only once
+    :param file_name: path to the catalog file
+    """
+    if file_name not in catalogs:
+        with open(file_name, "r") as file:
+            catalogs[file_name] = PartsCatalog(json.load(file)["parts"])
+    return catalogs[file_name]
+
+
 if __name__ == "__main__":
     print("this module is not for direct use")
@@ -0,0 +1,337 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import recording
+import sandbox
+import trajectory_calculation
+import vehicles
+
+PHYSICS_RATE = 20
+"""Number of physics steps per second of real time"""
+MAX_VEHICLES = 256
+"""Number of vehicles of the scene, which are published, the rest are simulated but not drawn"""
+COMMANDS = 256
+"""Size of the command ring buffer"""
+STOP = 255
+START_METHOD = "spawn"
+"""Start method of the physics process, it is available on every platform and the new process does not inherit
+the state of SDL. main.py starts the game only under the __main__ guard, so the new process just imports it"""
+SLOTS = 3
+PUBLISHED, HEAD, TAIL = range(3)
+"""Positions in the header: published slot, written and read commands"""
+CONTACT = np.dtype([("present", "u1"), ("body", "<i8"), ("parameters", "<f8", 4), ("velocity", "<f8", 2),
+                    ("time", "<f8"), ("longitude", "<f8")])
+
+
+def slot_dtype(log_size):
+    """
+    Returns layout of one published state
+    :param log_size: number of predicative orbit points
+    """
+    return np.dtype([("sequence", "<i8"), ("tick", "<i8"), ("wall_time", "<f8"), ("parameters", "<f8", 4),
+                     ("previous_parameters", "<f8", 4), ("current_time", "<f8"), ("previous_time", "<f8"),
+                     ("fuel_remained", "<f8"), ("current_stage_mass", "<f8"), ("engine_power", "<f8"),
+                     ("direction", "<f8", 2), ("gas_exhaust_speed", "<f8"), ("fuel_consumption", "<f8"),
+                     ("angle", "<f8"), ("previous_angle", "<f8"), ("engine_is_on_flag", "u1"),
+                     ("landed_flag", "u1"), ("collision_flag", "u1"), ("contact", CONTACT),
+                     ("predicted_contact", CONTACT), ("count", "<i8"), ("orbit", "<f8", (log_size, 4)),
+                     ("times", "<f8", log_size), ("vehicles", "<i8"), ("controlled", "<i8"),
+                     ("state", "<f8", (MAX_VEHICLES, 4)), ("previous_state", "<f8", (MAX_VEHICLES, 4)),
+                     ("collided", "u1", MAX_VEHICLES)])
+
+
+class SharedState:
+    """
+    Views of the shared memory block: header, command ring buffer and SLOTS published states. The physics process
+    writes a state into the slot after the published one and then publishes it. Every slot has a sequence counter,
+    which is odd while the slot is written and even when it is complete. The renderer copies the published slot
+    and checks the counter again, the copy is made again if the slot was written meanwhile, so the renderer never
+    uses a half-written state and the physics process never waits for it
+    """
+
+    def __init__(self, log_size, name=None):
+        """
+        Creating or attaching shared memory
+        :param log_size: number of predicative orbit points
+        :param name: name of an existing block, a new block is created if None
+        """
+        self.slot = slot_dtype(log_size)
+        size = 8 * 3 + 4 * COMMANDS + SLOTS * self.slot.itemsize
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.header = np.ndarray(3, dtype="<i8", buffer=self.memory.buf)
+        self.commands = np.ndarray(COMMANDS, dtype="<i4", buffer=self.memory.buf, offset=8 * 3)
+        self.slots = np.ndarray(SLOTS, dtype=self.slot, buffer=self.memory.buf, offset=8 * 3 + 4 * COMMANDS)
+        if name is None:
+            self.header[:] = [-1, 0, 0]
+            self.slots["sequence"] = 0
+
+    def push(self, code):
+        """
+        Adding command, called only by the renderer
+        :param code: control code from recording
+        :return: False if the buffer is full
+        """
+        head = self.header[HEAD]
+        if head - self.header[TAIL] >= COMMANDS:
+            return False
+        self.commands[head % COMMANDS] = code
+        self.header[HEAD] = head + 1
+        return True
+
+    def pop_all(self):
+        """
+        Taking all commands, called only by the physics process
+        :return: list of codes
+        """
+        tail, head = self.header[TAIL], self.header[HEAD]
+        codes = [int(self.commands[i % COMMANDS]) for i in range(tail, head)]
+        self.header[TAIL] = head
+        return codes
+
+    def begin_write(self):
+        """
+        Returns number of the slot, which the physics process writes next, its sequence counter is made odd
+        """
+        i = (self.header[PUBLISHED] + 1) % SLOTS
+        self.slots[i]["sequence"] += 1
+        return i
+
+    def end_write(self, i):
+        """
+        Making the sequence counter of a written slot even and publishing the slot
+        :param i: number of the slot returned by begin_write
+        """
+        self.slots[i]["sequence"] += 1
+        self.header[PUBLISHED] = i
+
+    def read(self):
+        """
+        Returns copy of the published state, the copy is made again if the physics process started to write the
+        slot before the copy was complete
+        :return: record of the slot layout or None if nothing is published yet
+        """
+        while True:
+            published = self.header[PUBLISHED]
+            if published < 0:
+                return None
+            slot = self.slots[published]
+            sequence = slot["sequence"]
+            if sequence % 2 == 1:
+                continue
+            state = slot.copy()
+            if slot["sequence"] == sequence:
+                return state
+
+    def close(self):
+        """
+        Releasing views and closing the block
+        """
+        del self.header, self.commands, self.slots
+        self.memory.close()
+
+
+def write_contact(target, contact):
+    """
+    Writing contact into a CONTACT record
+    :param target: CONTACT record
+    :param contact: object of class Contact from trajectory_calculation or None
+    """
+    target["present"] = contact is not None
+    if contact is not None:
+        target["body"] = contact.body
+        target["parameters"] = contact.parameters
+        target["velocity"] = contact.velocity
+        target["time"] = contact.time
+        target["longitude"] = contact.longitude
+
+
+def read_contact(source, landing_speed):
+    """
+    Returns contact stored in a CONTACT record
+    :param source: CONTACT record
+    :param landing_speed: maximum speed of landing
+    :return: object of class Contact from trajectory_calculation or None
+    """
+    if not source["present"]:
+        return None
+    return trajectory_calculation.Contact(int(source["body"]), source["parameters"].copy(),
+                                          source["velocity"].copy(), float(source["time"]),
+                                          float(source["longitude"]), landing_speed)
+
+
+def publish(shared, flight):
+    """
+    Writing the state of the flight into the next slot and publishing it
+    :param shared: object of class SharedState
+    :param flight: object of class Flight from recording
+    """
+    i = shared.begin_write()
+    slot = shared.slots[i]
+    engine, scene = flight.engine, flight.scene
+    parameters = engine.rocket_parameters
+    slot["tick"] = flight.tick
+    slot["wall_time"] = time.perf_counter()
+    for name in ("parameters", "previous_parameters", "current_time", "previous_time", "fuel_remained",
+                 "current_stage_mass", "engine_power", "direction", "engine_is_on_flag", "landed_flag",
+                 "collision_flag"):
+        slot[name] = getattr(parameters, name)
+    slot["gas_exhaust_speed"] = engine.constants.gas_exhaust_speed
+    slot["fuel_consumption"] = engine.constants.fuel_consumption
+    slot["angle"] = flight.rocket.angle
+    slot["previous_angle"] = flight.rocket.previous_angle
+    write_contact(slot["contact"], parameters.contact)
+    write_contact(slot["predicted_contact"], parameters.predicted_contact)
+    count = len(parameters.predictive_orbit)
+    slot["count"] = count
+    slot["orbit"][:count] = parameters.predictive_orbit
+    slot["times"][:count] = parameters.predictive_times
+    vehicles_count = min(scene.count, MAX_VEHICLES)
+    slot["vehicles"] = vehicles_count
+    slot["controlled"] = scene.controlled
+    slot["state"][:vehicles_count] = scene.state[:vehicles_count]
+    slot["previous_state"][:vehicles_count] = scene.previous_state[:vehicles_count]
+    slot["collided"][:vehicles_count] = scene.collided[:vehicles_count]
+    shared.end_write(i)
+
+
+def run_physics(name, log_size, rocket_lines, angle, rate):
+    """
+    Main function of the physics process: applying commands and calculating steps with a fixed rate
+    :param name: name of the shared memory block
+    :param log_size: number of predicative orbit points
+    :param rocket_lines: lines of the rocket file, see sandbox.rocket_lines
+    :param angle: initial angle of the rocket
+    :param rate: number of steps per second
+    """
+    shared = SharedState(log_size, name)
+    rocket = sandbox.rocket_from_lines(rocket_lines)
+    rocket.angle = rocket.previous_angle = angle
+    flight = recording.Flight(rocket)
+    flight.engine.set_predicative_orbit_log_size(log_size)
+    publish(shared, flight)
+    next_time = time.perf_counter()
+    while True:
+        codes = shared.pop_all()
+        if STOP in codes:
+            break
+        if not flight.engine.rocket_parameters.collision_flag:
+            flight.process_tick(codes)
+            publish(shared, flight)
+        next_time += 1 / rate
+        time.sleep(max(next_time - time.perf_counter(), 0))
+    shared.close()
+
+
+class RemoteScene:
+    """
+    Vehicles published by the physics process, with the same interface as Scene from vehicles for drawing
+    """
+
+    positions = vehicles.Scene.positions
+
+    def __init__(self, parameters):
+        """
+        Initializing scene with the controlled vehicle only, it is drawn until the first state is published
+        :param parameters: [x, y, vx, vy] array of the controlled vehicle
+        """
+        self.count = 1
+        self.controlled = 0
+        self.state = np.array([parameters], dtype=float)
+        self.previous_state = self.state.copy()
+        self.collided = np.zeros(1, dtype=bool)
+
+
+class PhysicsProcess:
+    """
+    Flight calculated by a separate process. The renderer gets an engine, whose rocket parameters are taken from the
+    last published state, and sends controls through the command ring buffer, the same way as to Flight from recording
+    """
+
+    def __init__(self, rocket, rate=PHYSICS_RATE):
+        """
+        Starting physics process for a rocket standing on the launch site
+        :param rocket: object of class Rocket from sandbox
+        :param rate: number of steps per second
+        """
+        self.rocket = rocket
+        self.engine = trajectory_calculation.PhysicsEngine(*rocket.get_active_parameters(), [6.37e6, 0, 0, 0])
+        self.engine.switch_engine(True, 0)
+        self.scene = RemoteScene(self.engine.rocket_parameters.parameters)
+        self.rate = rate
+        self.tick = -1
+        self.start = 0
+        self.turn = "None"
+        self.power = "None"
+        log_size = self.engine.constants.log_size
+        self.shared = SharedState(log_size)
+        self.process = multiprocessing.get_context(START_METHOD).Process(target=run_physics, name="physics",
+                                                                         daemon=True, args=(
+            self.shared.memory.name, log_size, sandbox.rocket_lines(rocket), rocket.angle, rate))
+        self.process.start()
+
+    def control(self, code):
+        """
+        Sending control to the physics process
+        :param code: one of the control codes from recording
+        """
+        self.shared.push(code)
+
+    def update(self, start, turn, power):
+        """
+        Sending changes of the held keys and taking the last published state
+        :param start: flag, that shows whether rocket was launched
+        :param turn: flag that shows whether right or left arrow is held
+        :param power: flag that shows whether Shift(increase speed) or CTRL(reduce speed) is held
+        :return: position of the frame between the two last physics steps, from 0 to 1
+        """
+        if start and not self.start:
+            self.start = 1
+            self.control(recording.LAUNCH)
+        if turn != self.turn:
+            self.turn = turn
+            self.control(recording.TURN_CODES[turn])
+        if power != self.power:
+            self.power = power
+            self.control(recording.POWER_CODES[power])
+
+        slot = self.shared.read()
+        if slot is None:
+            return 1.0
+        parameters = self.engine.rocket_parameters
+        constants = self.engine.constants
+        for name in ("parameters", "previous_parameters", "direction"):
+            setattr(parameters, name, slot[name])
+        for name in ("current_time", "previous_time", "fuel_remained", "current_stage_mass", "engine_power"):
+            setattr(parameters, name, float(slot[name]))
+        for name in ("engine_is_on_flag", "landed_flag", "collision_flag"):
+            setattr(parameters, name, bool(slot[name]))
+        constants.gas_exhaust_speed = float(slot["gas_exhaust_speed"])
+        constants.fuel_consumption = float(slot["fuel_consumption"])
+        parameters.contact = read_contact(slot["contact"], constants.landing_speed)
+        parameters.predicted_contact = read_contact(slot["predicted_contact"], constants.landing_speed)
+        parameters.predictive_orbit = slot["orbit"][:slot["count"]]
+        parameters.predictive_times = slot["times"][:slot["count"]]
+        self.rocket.angle = float(slot["angle"])
+        self.rocket.previous_angle = float(slot["previous_angle"])
+        scene = self.scene
+        scene.count = int(slot["vehicles"])
+        scene.controlled = int(slot["controlled"])
+        scene.state = slot["state"]
+        scene.previous_state = slot["previous_state"]
+        scene.collided = slot["collided"].view(bool)
+        self.tick = int(slot["tick"])
+        return min(max((time.perf_counter() - slot["wall_time"]) * self.rate, 0.0), 1.0)
+
+    def close(self):
+        """
+        Stopping the physics process and removing the shared memory
+        """
+        self.shared.push(STOP)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.shared.close()
+        self.shared.memory.unlink()
@@ -0,0 +1,195 @@
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+import sandbox
+import trajectory_calculation
+import vehicles
+
+LAUNCH = 0
+TURN_NONE = 1
+TURN_RIGHT = 2
+TURN_LEFT = 3
+POWER_NONE = 4
+POWER_INCREASE = 5
+POWER_REDUCE = 6
+NUDGE_RIGHT = 7
+NUDGE_LEFT = 8
+STEP_UP = 9
+STEP_DOWN = 10
+DROP_TARGET = 11
+NEXT_VEHICLE = 12
+TURN_CODES = {"None": TURN_NONE, "right": TURN_RIGHT, "left": TURN_LEFT}
+POWER_CODES = {"None": POWER_NONE, "increase": POWER_INCREASE, "reduce": POWER_REDUCE}
+EVENT = np.dtype([("tick", "<u4"), ("code", "u1")])
+"""One recorded control: number of the tick, at the beginning of which it is applied, and its code"""
+
+
+class Flight:
+    """
+    Simulation of the play menu without drawing. Controls are applied only at the beginning of physics ticks, so a
+    flight is fully defined by the rocket and the list of (tick, code) events and can be recorded and replayed
+    """
+
+    def __init__(self, rocket, record=False, predict=True):
+        """
+        Initializing flight of a rocket standing on the launch site
+        :param rocket: object of class Rocket from sandbox
+        :param record: whether to record controls
+        :param predict: whether to calculate predicative orbit on every tick, it does not change the flight
+        """
+        self.rocket = rocket
+        self.engine = trajectory_calculation.PhysicsEngine(*rocket.get_active_parameters(), [6.37e6, 0, 0, 0])
+        self.engine.switch_engine(True, 0)
+        self.engine.set_rocket_direction(0)
+        self.engine.constants.cross_section = rocket.cross_section()
+        self.scene = vehicles.Scene(self.engine)
+        self.predict = predict
+        self.tick = 0
+        self.start = 0
+        self.turn = "None"
+        self.power = "None"
+        self.pending = []
+        self.initial_angle = rocket.angle
+        self.initial_lines = sandbox.rocket_lines(rocket)
+        self.events = [] if record else None
+        self.history = None
+
+    def control(self, code):
+        """
+        Adding control, which is applied at the beginning of the next tick
+        :param code: one of the control codes
+        """
+        self.pending.append(code)
+
+    def step(self, start, turn, power):
+        """
+        Processing one tick with the flags of held keys, changes of the flags are turned into control codes
+        :param start: flag, that shows whether rocket was launched
+        :param turn: flag that shows whether right or left arrow is held
+        :param power: flag that shows whether Shift(increase speed) or CTRL(reduce speed) is held
+        """
+        codes = self.pending
+        self.pending = []
+        if start and not self.start:
+            codes.append(LAUNCH)
+        if turn != self.turn:
+            codes.append(TURN_CODES[turn])
+        if power != self.power:
+            codes.append(POWER_CODES[power])
+        self.process_tick(codes)
+
+    def apply(self, code):
+        """
+        Applying one control
+        :param code: one of the control codes
+        """
+        parameters = self.engine.rocket_parameters
+        if code == LAUNCH:
+            self.start = 1
+        elif code in (TURN_NONE, TURN_RIGHT, TURN_LEFT):
+            self.turn = ("None", "right", "left")[code - TURN_NONE]
+        elif code in (POWER_NONE, POWER_INCREASE, POWER_REDUCE):
+            self.power = ("None", "increase", "reduce")[code - POWER_NONE]
+        elif code == NUDGE_RIGHT:
+            self.rocket.angle -= 1
+        elif code == NUDGE_LEFT:
+            self.rocket.angle += 1
+        elif code == STEP_UP and parameters.engine_power < 100:
+            parameters.engine_power += 2
+        elif code == STEP_DOWN and parameters.engine_power > 0:
+            parameters.engine_power -= 2
+        elif code == DROP_TARGET:
+            self.scene.drop_target()
+        elif code == NEXT_VEHICLE:
+            self.rocket.angle = self.rocket.previous_angle = self.scene.select_next()
+
+    def process_tick(self, codes):
+        """
+        Applying controls and held keys and, if the rocket was launched, calculating new step
+        :param codes: control codes of this tick
+        """
+        if self.history is not None:
+            self.history.add(self.tick, codes)
+        if self.events is not None:
+            self.events.extend((self.tick, code) for code in codes)
+        self.rocket.previous_angle = self.rocket.angle
+        for code in codes:
+            self.apply(code)
+        if self.turn == "right":
+            self.rocket.angle -= 1
+        if self.turn == "left":
+            self.rocket.angle += 1
+        self.engine.set_rocket_direction(np.deg2rad(self.rocket.angle + 90))
+
+        parameters = self.engine.rocket_parameters
+        if (self.power == "increase") and (parameters.engine_power < 100):
+            parameters.engine_power += 2
+        if (self.power == "reduce") and (parameters.engine_power > 0):
+            parameters.engine_power -= 2
+
+        if self.start == 1:
+            self.scene.step(parameters.current_time)
+            if self.predict:
+                self.engine.process_step()
+            else:
+                self.engine.calc_step()
+                self.engine.detect_collision()
+        self.tick += 1
+
+    def state(self):
+        """
+        Returns the state of the flight, which must be the same after replay: [x, y, vx, vy, time, mass, fuel,
+        engine_power, angle] and states of all vehicles
+        """
+        parameters = self.engine.rocket_parameters
+        self.scene.store(self.engine)
+        return np.concatenate([parameters.parameters, [parameters.current_time, parameters.current_stage_mass,
+                                                       parameters.fuel_remained, parameters.engine_power,
+                                                       self.rocket.angle], self.scene.state[:self.scene.count].ravel()])
+
+    def save(self, file_name):
+        """
+        Saving recorded controls, the rocket and the final state
+        :param file_name: path to the .npz file
+        """
+        np.savez_compressed(file_name, events=np.array(self.events, dtype=EVENT), ticks=self.tick,
+                            rocket="".join(self.initial_lines), angle=self.initial_angle, state=self.state())
+
+
+def replay(file_name, predict=True):
+    """
+    Replaying recorded flight as fast as possible
+    :param file_name: path to the .npz file saved by Flight.save
+    :param predict: whether to calculate predicative orbit on every tick
+    :return: object of class Flight after the last recorded tick, recorded final state
+    """
+    recording = np.load(file_name)
+    rocket = sandbox.rocket_from_lines(str(recording["rocket"]).splitlines())
+    rocket.angle = rocket.previous_angle = float(recording["angle"])
+    flight = Flight(rocket, predict=predict)
+    events = recording["events"]
+    bounds = np.searchsorted(events["tick"], np.arange(int(recording["ticks"]) + 1))
+    for tick in range(int(recording["ticks"])):
+        flight.process_tick(events["code"][bounds[tick]:bounds[tick + 1]].tolist())
+    return flight, recording["state"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a flight recorded with main.py --record without a window")
+    parser.add_argument("recording", help=".npz file with the recorded flight")
+    parser.add_argument("--no-predict", action="store_true", help="skip predicative orbit, it does not change the "
+                                                                  "flight")
+    parser.add_argument("--repeat", type=int, default=1, help="number of replays for benchmarking")
+    args = parser.parse_args()
+
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        flight, recorded = replay(args.recording, not args.no_predict)
+        seconds = time.perf_counter() - start
+        state = flight.state()
+        print(f"{flight.tick} ticks in {seconds:.3f} s, {flight.tick / seconds:.0f} ticks/s, "
+              f"state {hashlib.sha1(state.tobytes()).hexdigest()[:12]}, "
+              f"{'identical' if np.array_equal(state, recorded) else 'DIFFERS from the recording'}")
@@ -0,0 +1,165 @@
+import bisect
+import collections
+
+import numpy as np
+
+import recording
+
+KEYFRAME_INTERVAL = 200
+"""Number of ticks between two keyframes, rewind calculates at most this number of ticks again"""
+KEYFRAMES = 360
+"""Size of the keyframe ring buffer, 360 keyframes of 200 ticks keep the last hour of the flight"""
+REWIND_STEP = 100
+"""Number of ticks moved by one key press while the flight is paused"""
+ENGINE_FIELDS = ("parameters", "previous_parameters", "direction", "current_time", "previous_time", "contact",
+                 "current_stage_mass", "fuel_remained", "engine_power", "engine_is_on_flag", "collision_flag",
+                 "landed_flag")
+"""Fields of RocketParameters, which define the flight, the predicative orbit is calculated again"""
+CONSTANT_FIELDS = ("gas_exhaust_speed", "fuel_consumption", "cross_section")
+"""Fields of Constants, which change when control is switched to another vehicle"""
+SCENE_FIELDS = ("state", "previous_state", "mass", "cross_section", "fuel", "exhaust_speed", "fuel_consumption",
+                "engine_power", "direction", "engine_on", "collided")
+FLIGHT_FIELDS = ("tick", "start", "turn", "power")
+
+
+def copy_fields(source, names):
+    """
+    Returns dictionary with values of the fields, arrays are copied
+    :param source: object
+    :param names: names of the fields
+    """
+    return {name: np.copy(value) if isinstance(value, np.ndarray) else value
+            for name, value in ((name, getattr(source, name)) for name in names)}
+
+
+def set_fields(target, values):
+    """
+    Setting fields from a dictionary made by copy_fields, arrays are copied, so the dictionary can be used again
+    :param target: object
+    :param values: dictionary of values
+    """
+    for name, value in values.items():
+        setattr(target, name, np.copy(value) if isinstance(value, np.ndarray) else value)
+
+
+class Keyframe:
+    """
+    Full state of a flight at the beginning of a tick and the controls applied from this tick to the next keyframe
+    """
+
+    def __init__(self, flight):
+        """
+        Taking the state of a flight
+        :param flight: object of class Flight from recording
+        """
+        self.tick = flight.tick
+        self.flight = copy_fields(flight, FLIGHT_FIELDS)
+        self.angle = (flight.rocket.angle, flight.rocket.previous_angle)
+        self.parameters = copy_fields(flight.engine.rocket_parameters, ENGINE_FIELDS)
+        self.constants = copy_fields(flight.engine.constants, CONSTANT_FIELDS)
+        self.scene = copy_fields(flight.scene, SCENE_FIELDS + ("count", "controlled"))
+        self.events = []
+
+    def close(self):
+        """
+        Turning the list of controls into an array of recording.EVENT, when the next keyframe is taken
+        """
+        self.events = np.array(self.events, dtype=recording.EVENT)
+
+    def restore(self, flight):
+        """
+        Setting the state of a flight
+        :param flight: object of class Flight from recording
+        """
+        set_fields(flight, self.flight)
+        flight.rocket.angle, flight.rocket.previous_angle = self.angle
+        set_fields(flight.engine.rocket_parameters, self.parameters)
+        set_fields(flight.engine.constants, self.constants)
+        set_fields(flight.scene, self.scene)
+
+    def codes(self, tick):
+        """
+        Returns controls applied at a tick
+        :param tick: tick between this keyframe and the next one
+        """
+        return [int(code) for event_tick, code in self.events if event_tick == tick]
+
+
+class History:
+    """
+    Rewind of a flight. Keyframes are taken every KEYFRAME_INTERVAL ticks into a ring buffer of KEYFRAMES, the
+    controls between them are stored as (tick, code) events, which take memory only on ticks with controls. A past
+    tick is reconstructed by restoring the nearest keyframe before it and applying the stored controls again, the
+    flight is deterministic, so the result is identical to the flown one
+    """
+
+    def __init__(self, flight, interval=KEYFRAME_INTERVAL, capacity=KEYFRAMES):
+        """
+        Initializing history and attaching it to a flight, the flight adds its ticks to it
+        :param flight: object of class Flight from recording
+        :param interval: number of ticks between two keyframes
+        :param capacity: maximum number of keyframes, the oldest keyframe is removed when a new one does not fit
+        """
+        self.flight = flight
+        self.interval = interval
+        self.keyframes = collections.deque(maxlen=capacity)
+        self.end = flight.tick
+        flight.history = self
+
+    def first_tick(self):
+        """
+        Returns the oldest tick, which can be reconstructed
+        """
+        return self.keyframes[0].tick if self.keyframes else self.end
+
+    def add(self, tick, codes):
+        """
+        Adding a tick before it is processed, the ticks after it are removed if the flight was rewound
+        :param tick: number of the tick
+        :param codes: control codes of the tick
+        """
+        if tick < self.end:
+            self.truncate(tick)
+        if tick % self.interval == 0 and (not self.keyframes or self.keyframes[-1].tick < tick):
+            if self.keyframes:
+                self.keyframes[-1].close()
+            self.keyframes.append(Keyframe(self.flight))
+        if self.keyframes:
+            self.keyframes[-1].events.extend((tick, code) for code in codes)
+        self.end = tick + 1
+
+    def truncate(self, tick):
+        """
+        Removing keyframes and controls from a tick on, also from the recording of the flight
+        :param tick: the first removed tick
+        """
+        while self.keyframes and self.keyframes[-1].tick > tick:
+            self.keyframes.pop()
+        if self.keyframes:
+            last = self.keyframes[-1]
+            last.events = [(int(event_tick), int(code)) for event_tick, code in last.events if event_tick < tick]
+        if self.flight.events is not None:
+            self.flight.events = [event for event in self.flight.events if event[0] < tick]
+        self.end = tick
+
+    def seek(self, tick):
+        """
+        Reconstructing the flight at a tick. The ticks after it are kept until the next tick is processed, so the
+        flight can be moved forward again while it is paused
+        :param tick: number of the tick, it is limited by the oldest keyframe and the last processed tick
+        :return: number of the tick, at which the flight is now
+        """
+        if not self.keyframes:
+            return self.flight.tick
+        tick = min(max(tick, self.first_tick()), self.end)
+        flight = self.flight
+        keyframe = self.keyframes[bisect.bisect_right([frame.tick for frame in self.keyframes], tick) - 1]
+        keyframe.restore(flight)
+        predict, events = flight.predict, flight.events
+        flight.history, flight.predict, flight.events = None, False, None
+        for current in range(keyframe.tick, tick):
+            flight.process_tick(keyframe.codes(current))
+        flight.history, flight.predict, flight.events = self, predict, events
+        if predict:
+            flight.engine.calc_predicative_orbit()
+        return flight.tick
@@ -1,12 +1,21 @@
+import math
+
 import pygame
 
+import assets
 import parts as p
 import trajectory_calculation
 
+FIRE = "textures/fire/fire.png"
+PART_SCALE = 0.05
+"""Metres per unit of part size in the catalog"""
+
 
 class Rocket:
     """
-    Rocket class. Has an aray of parts, physical engine and a canvas, which as a drawn rocket on it
+    Rocket class. Has an aray of parts, physical engine and a canvas, which as a drawn rocket on it.
+    Sums of part characteristics and the layout are kept up to date on every change, version is increased on every
+    change, so other objects can cache values computed from the rocket
     """
 
     def __init__(self):
@@ -17,10 +26,17 @@ class Rocket:
         self.width = 100
         self.height = 900
         self.surface = pygame.Surface([100, 900], pygame.SRCALPHA)
+        self.parts_surface = self.surface
         self.angle = -90
+        self.previous_angle = -90
         self.parts = []
         self.engine_bottom = 0
-        self.fire_texture = pygame.image.load("textures/fire/fire.png")
+        self.parts_height = 0
+
+        self.version = 0
+        self.layout_version = 0
+        self.drawn = None
+        self.active_parameters = [0, 0, 0, 0, 0]
 
         self.physics_engine = None
 
@@ -34,30 +50,58 @@ class Rocket:
         """
         activates all rocket parts
         """
-        for part in self.parts:
-            part.active = True
+        self.set_active(self.parts, True)
 
-    def get_active_parameters(self):
+    def set_active(self, part_entities, active):
         """
-        returns characteristics of the rocket as a sum of the part's characteristics
+        activates or deactivates rocket parts
+        part_entities - list of Entity class objects of this rocket
+        active - new activity of the parts
         """
-        initial_mass = 0
-        exhaust_speed = 0
-        fuel_consumption = 0
-        capacity = 0
-        fuel = 0
+        for part in part_entities:
+            part.active = active
+        self.changed()
 
+    def changed(self):
+        """
+        must be called after parts were changed directly,
+        recounts characteristics and increases version
+        """
+        self.active_parameters = [0, 0, 0, 0, 0]
         for part in self.parts:
-            initial_mass += part.mass
-            if part.type == "fueltank" and part.active:
-                capacity += part.capacity
-                fuel += part.capacity * part.fullness
+            self.count_part(part)
+        self.version += 1
 
-            elif part.type == "engine" and part.active:
-                exhaust_speed = part.output * part.power
-                fuel_consumption = part.output * part.consumption
+    def count_part(self, part):
+        """
+        adds characteristics of the part to the sums of the rocket
+        part - Entity class object
+        """
+        self.active_parameters[0] += part.mass
+        if part.type == "fueltank" and part.active:
+            self.active_parameters[3] += part.capacity
+            self.active_parameters[4] += part.capacity * part.fullness
 
-        return [initial_mass, exhaust_speed, fuel_consumption, capacity, fuel]
+        elif part.type == "engine" and part.active:
+            self.active_parameters[1] = part.output * part.power
+            self.active_parameters[2] = part.output * part.consumption
+
+    def get_active_parameters(self):
+        """
+        returns characteristics of the rocket as a sum of the part's characteristics:
+        [initial_mass, exhaust_speed, fuel_consumption, capacity, fuel]
+        """
+        return list(self.active_parameters)
+
+    def cross_section(self):
+        """
+        returns area of the rocket cross-section in square metres for atmospheric drag,
+        the rocket is round and as wide as its widest part
+        """
+        catalog = p.load_catalog()
+        width = max((catalog.width[catalog.index[part.part_id]] for part in self.parts
+                     if part.part_id in catalog.index), default=0)
+        return math.pi * (width * PART_SCALE / 2) ** 2
 
     def add_part(self, part_entity):
         """
@@ -66,18 +110,35 @@ class Rocket:
         """
         part_entity.surface = self.surface
         self.parts.append(part_entity)
-        part_entity.draw()
+        self.count_part(part_entity)
+        self.version += 1
+
+    def clear(self):
+        """
+        removes all parts from the rocket
+        """
+        self.parts.clear()
+        self.surface = pygame.Surface([self.width, self.height], pygame.SRCALPHA)
+        self.parts_surface = self.surface
+        self.changed()
+        self.layout_version = self.version
 
     def recount(self):
         """
         This function builds rocket from it's parts array.
         It makes rocket parts to follow the order from up to down:
         capsule, fueltanks, engine
+        Does nothing if the rocket was not changed since the last call
         """
+        if self.layout_version == self.version:
+            return
+        self.layout_version = self.version
         fuel_tanks_y = [0]
         cabin_height = 0
         part_counter = 0
+        self.parts_height = 0
         for part_entity in self.parts:
+            self.parts_height += part_entity.texture.get_height()
             if part_entity.type == "fueltank":
                 fuel_tanks_y.append(fuel_tanks_y[-1] + part_entity.texture.get_height())
             elif part_entity.type == "cabin":
@@ -90,55 +151,73 @@ class Rocket:
             elif part_entity.type == "engine":
                 part_entity.y = cabin_height + fuel_tanks_y[-1]
                 self.engine_bottom = part_entity.y + part_entity.texture.get_height()
-        self.surface = pygame.Surface([self.width, self.engine_bottom + 200], pygame.SRCALPHA)
+        self.parts_surface = pygame.Surface([self.width, self.engine_bottom + 200], pygame.SRCALPHA)
         for part_entity in self.parts:
-            part_entity.surface = self.surface
+            part_entity.surface = self.parts_surface
             part_entity.draw()
+        self.surface = self.parts_surface
 
     def get_surface(self):
         """
         returns canvas with the drawn rocket on it
         """
+        self.recount()
         return self.surface
 
     def draw(self, engine_power):
         """
         draws rocket on it's canvas and adds engine fire
         engine power - percentage of current power from maximum
-        """
-        self.surface = pygame.Surface([self.width, self.engine_bottom + 200], pygame.SRCALPHA)
-        for part_entity in self.parts:
-            part_entity.surface = self.surface
-            part_entity.draw()
-        fire_scaled = pygame.transform.scale(self.fire_texture, [self.width * 2 // 3,
-                                                                 self.fire_texture.get_height() * engine_power / 300])
+        the canvas is redrawn only when the rocket or engine power were changed
+        """
+        self.recount()
+        if self.drawn == (self.version, engine_power):
+            return
+        self.drawn = (self.version, engine_power)
+        self.surface = self.parts_surface.copy()
+        fire_texture = assets.image(FIRE)
+        fire_scaled = pygame.transform.scale(fire_texture, [self.width * 2 // 3,
+                                                            fire_texture.get_height() * engine_power / 300])
         self.surface.blit(fire_scaled, dest=[(self.width // 2) - (fire_scaled.get_width() // 2), self.engine_bottom])
 
 
 def load_rocket(sourcefile):
     """
     loads rocket from the file
-    sourcefile - path to the file with rocket
+    sourcefile - path to the file with rocket, each line is "part_id x y", ids are from the parts catalog
     """
-    rocket_entity = Rocket()
     with open(sourcefile, "r") as f:
-        part_lines = f.readlines()
+        return rocket_from_lines(f.readlines())
+
+
+def rocket_from_lines(part_lines):
+    """
+    creates rocket from the lines of a rocket file
+    part_lines - list of strings "part_id x y"
+    """
+    catalog = p.load_catalog()
+    rocket_entity = Rocket()
     for part_line in part_lines:
         part_line_array = part_line.split()
-        part_type = part_line_array[0]
-        print(part_type, part_line_array[1], part_line_array[2])
-        part_entity = None
-        if part_type == "engine":
-            # А другие параметры не волнуют, ракету мы загружаем только при старте
-            part_entity = p.Engine(0, x=int(part_line_array[1]), y=int(part_line_array[2]))
-        elif part_type == "fueltank":
-            part_entity = p.FuelTank(0, x=int(part_line_array[1]), y=int(part_line_array[2]))
-        elif part_type == "cabin":
-            part_entity = p.Cabin(0, x=int(part_line_array[1]), y=int(part_line_array[2]))
+        if not part_line_array:
+            continue
+        part_id = part_line_array[0]
+        part_entity = catalog.create(part_id, x=int(part_line_array[1]), y=int(part_line_array[2]))
+        part_entity.texture = catalog.texture(part_id)
         rocket_entity.add_part(part_entity)
+    rocket_entity.recount()
     return rocket_entity
 
 
+def rocket_lines(rocket_entity):
+    """
+    returns the lines of a rocket file, "part_id x y" for every part
+    rocket_entity - Rocket class object
+    """
+    return [str(part_entity.part_id) + " " + str(part_entity.x) + " " + str(part_entity.y) + "\n"
+            for part_entity in rocket_entity.parts]
+
+
 def save_rocket(rocket_entity, outfile):
     """
     saves the rocket to the file
@@ -146,8 +225,7 @@ def save_rocket(rocket_entity, outfile):
     outfile - path to the file
     """
     with open(outfile, "w") as file:
-        for part_entity in rocket_entity.parts:
-            file.write(str(part_entity.type) + " " + str(part_entity.x) + " " + str(part_entity.y) + "\n")
+        file.writelines(rocket_lines(rocket_entity))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,14 @@
+import copy
 import random
 import sys
 
 import pygame
 
+import assets
+import design_space
 import parts
 
-BG = pygame.image.load("textures/sandbox_menu/sandbox_back.png")
-
-pygame.mixer.init()
+BACKGROUND = "textures/sandbox_menu/sandbox_back.png"
 playlist = [
     "textures/music/Trava_u_doma.mp3",
     "textures/music/Star_finder.mp3",
@@ -17,6 +18,8 @@ playlist = [
     "textures/music/My_Way.mp3",
     "textures/music/Stop.mp3",
 ]
+catalog = {}
+"""Part menus and text buttons of the sandbox, created on the first frame"""
 
 
 def get_font(size):  # Returns Press-Start-2P in the desired size
@@ -25,7 +28,7 @@ def get_font(size):  # Returns Press-Start-2P in the desired size
     :param size: font size
     :return:
     """
-    return pygame.font.Font("textures/menu/font.ttf", size)
+    return assets.font("textures/menu/font.ttf", size)
 
 
 class Button:
@@ -136,6 +139,7 @@ class Parts:
         self.screen = screen
         self.rocket = rocket
         self.arr = []
+        self.by_width = {}
 
     def blit(self):
         """
@@ -143,14 +147,31 @@ class Parts:
         """
         self.screen.blit(self.render, self.rect)
 
+    def compatible(self, size):
+        """
+        Returns parts, which fit a rocket of a particular width
+        :param size: width of a rocket, 0 if any part fits
+        """
+        if size == 0:
+            return self.arr
+        return self.by_width.get(size, [])
+
+    def index(self):
+        """
+        Function, which groups parts by the width of their textures. Must be called after resize
+        """
+        self.by_width = {}
+        for element in self.arr:
+            element.rect = element.entity.texture.get_rect(center=(element.x_pos, element.y_pos))
+            self.by_width.setdefault(element.entity.texture.get_width(), []).append(element)
+
     def update(self, size):
         """
         Function, which adds all database of a particular part of a particular size of a rocket to the screen
         :param size: width of a rocket
         """
-        for element in self.arr:
-            if (size == 0) or element.entity.texture.get_size()[0] == size:
-                element.update(self.screen)
+        for element in self.compatible(size):
+            element.update(self.screen)
 
     def resize(self):
         """
@@ -159,91 +180,75 @@ class Parts:
         pass
 
 
-class Cabin(Parts):
+class CatalogParts(Parts):
     """
-    Cabin class, inherited from class Parts
+    Parts of one type from the parts catalog, inherited from class Parts
     """
 
-    def __init__(self, screen, width, height, rocket):
+    def __init__(self, screen, width, rocket, part_type, text_pos, y, text, size=30):
         """
-        Initializing cabin class
+        Initializing parts of one type
         :param screen: screen
         :param width: screen width
-        :param height: screen height
         :param rocket: object of class Rocket from sandbox
-        """
-        Parts.__init__(self, int(width * 0.16), int(height / 12), screen, rocket=rocket, text="Choose capsule", size=30)
-        self.arr = [PartsButton(parts.Cabin(rocket.surface, mass=5000), pos=(int(width * 0.15), height / 4 - 50),
-                                image=pygame.image.load("textures/capsule/final/capsule_270x180.png")),
-                    PartsButton(parts.Cabin(rocket.surface, mass=3000), pos=(int(width * 0.15), height / 4 - 50),
-                                image=pygame.image.load("textures/capsule/final/capsule_270x180.png")),
-                    PartsButton(parts.Cabin(rocket.surface, mass=1500), pos=(int(width * 0.15), height / 4 - 50),
-                                image=pygame.image.load("textures/capsule/final/capsule_270x180.png"))
-                    ]
+        :param part_type: engine, fueltank or cabin
+        :param text_pos: position of the name of the parts on the screen
+        :param y: y coordinate of the parts on the screen
+        :param text: the name of the parts
+        :param size: size of text
+        """
+        catalog_parts = parts.load_catalog()
+        Parts.__init__(self, text_pos[0], text_pos[1], screen, rocket=rocket, text=text, size=size)
+        self.arr = [PartsButton(catalog_parts.create(part_id, rocket.surface),
+                                pos=(int(width * catalog_parts.menu_x[catalog_parts.index[part_id]]), y),
+                                image=catalog_parts.texture(part_id))
+                    for part_id in catalog_parts.of_type(part_type)]
 
     def resize(self):
         """
-        Resizes the size of Cabin parts.
+        Giving part entities their textures, already scaled by the catalog
         """
-        self.arr[0].entity.texture = pygame.transform.scale(self.arr[0].image, (80, 120))
-        self.arr[1].entity.texture = pygame.transform.scale(self.arr[1].image, (60, 90))
-        self.arr[2].entity.texture = pygame.transform.scale(self.arr[2].image, (40, 60))
+        for element in self.arr:
+            element.entity.texture = element.image
 
 
-class Tanks(Parts):
+class Cabin(CatalogParts):
     """
-    Fuel tanks class, inherited from class Parts
+    Cabin class, inherited from class CatalogParts
     """
 
     def __init__(self, screen, width, height, rocket):
         """
-        Initializing fuel tanks class
+        Initializing cabin class
         :param screen: screen
         :param width: screen width
         :param height: screen height
         :param rocket: object of class Rocket from sandbox
         """
-        Parts.__init__(self, int(width * 0.20), int(height * 0.32), screen, rocket=rocket,
-                       text="Choose fuel tanks(max 4)", size=25)
-
-        self.arr = [
-            PartsButton(parts.FuelTank(rocket.surface, capacity=20000, mass=22000), pos=(int(width * 0.04), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_180x180.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=35000, mass=38500), pos=(int(width * 0.12), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_270x180.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=45000, mass=49500), pos=(int(width * 0.20), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_360x180.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=30000, mass=33000), pos=(int(width * 0.04), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_180x240.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=40000, mass=44000), pos=(int(width * 0.12), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_270x240.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=550000, mass=60000),
-                        pos=(int(width * 0.20), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_360x240.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=27000, mass=30000), pos=(int(width * 0.04), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_270x120.png")),
-            PartsButton(parts.FuelTank(rocket.surface, capacity=35000, mass=39000), pos=(int(width * 0.12), height / 2),
-                        image=pygame.image.load("textures/tanks/final/fuel_tank_360x120.png"))
-
-        ]
+        CatalogParts.__init__(self, screen, width, rocket, "cabin", (int(width * 0.16), int(height / 12)),
+                              height / 4 - 50, "Choose capsule")
 
-    def resize(self):
+
+class Tanks(CatalogParts):
+    """
+    Fuel tanks class, inherited from class CatalogParts
+    """
+
+    def __init__(self, screen, width, height, rocket):
         """
-        Resizes the size of Fuel Tank parts.
+        Initializing fuel tanks class
+        :param screen: screen
+        :param width: screen width
+        :param height: screen height
+        :param rocket: object of class Rocket from sandbox
         """
-        self.arr[0].entity.texture = pygame.transform.scale(self.arr[0].image, (60, 60))
-        self.arr[1].entity.texture = pygame.transform.scale(self.arr[1].image, (60, 90))
-        self.arr[2].entity.texture = pygame.transform.scale(self.arr[2].image, (60, 120))
-        self.arr[3].entity.texture = pygame.transform.scale(self.arr[3].image, (80, 60))
-        self.arr[4].entity.texture = pygame.transform.scale(self.arr[4].image, (80, 90))
-        self.arr[5].entity.texture = pygame.transform.scale(self.arr[5].image, (80, 120))
-        self.arr[6].entity.texture = pygame.transform.scale(self.arr[6].image, (40, 90))
-        self.arr[7].entity.texture = pygame.transform.scale(self.arr[7].image, (40, 120))
+        CatalogParts.__init__(self, screen, width, rocket, "fueltank", (int(width * 0.20), int(height * 0.32)),
+                              height / 2, "Choose fuel tanks(max 4)", size=25)
 
 
-class Engines(Parts):
+class Engines(CatalogParts):
     """
-    Engines class, inherited from class Parts
+    Engines class, inherited from class CatalogParts
     """
 
     def __init__(self, screen, width, height, rocket):
@@ -254,27 +259,76 @@ class Engines(Parts):
         :param height: screen height
         :param rocket: object of class Rocket from sandbox
         """
-        Parts.__init__(self, int(width * 0.16), int(height * 0.64), screen, rocket=rocket, text="Choose engine",
-                       size=30)
+        CatalogParts.__init__(self, screen, width, rocket, "engine", (int(width * 0.16), int(height * 0.64)),
+                              3 * height / 4, "Choose engine")
 
-        self.arr = [PartsButton(parts.Engine(rocket.surface, power=10000, consumption=1, mass=3000),
-                                pos=(int(width * 0.04), 3 * height / 4),
-                                image=pygame.image.load("textures/engines/final/engine_180x120.png")),
-                    PartsButton(parts.Engine(rocket.surface, power=20000, consumption=3, mass=5000),
-                                pos=(int(width * 0.10), 3 * height / 4),
-                                image=pygame.image.load("textures/engines/final/engine_270x180.png")),
-                    PartsButton(parts.Engine(rocket.surface, power=40000, consumption=7, mass=9000),
-                                pos=(int(width * 0.16), 3 * height / 4),
-                                image=pygame.image.load("textures/engines/final/engine_360x240.png"))
-                    ]
 
-    def resize(self):
+class PerformanceReadout:
+    """
+    Delta-v, thrust-to-weight ratio, burn time and achievable orbit of the rocket being built.
+    Texts are rendered only when the rocket changes and are cached for every assembly
+    """
+
+    def __init__(self, x, y, size=15):
         """
-        Resizes the size of Engine parts.
+        Initializing readout
+        :param x: x coordinate of the top left corner of the text
+        :param y: y coordinate of the top left corner of the text
+        :param size: size of text
         """
-        self.arr[0].entity.texture = pygame.transform.scale(self.arr[0].image, (40, 60))
-        self.arr[1].entity.texture = pygame.transform.scale(self.arr[1].image, (60, 90))
-        self.arr[2].entity.texture = pygame.transform.scale(self.arr[2].image, (80, 120))
+        self.x = x
+        self.y = y
+        self.size = size
+        self.font = get_font(size)
+        self.version = None
+        self.lines = []
+        self.cache = {}
+
+    def update(self, rocket):
+        """
+        Updating texts, if the rocket was changed
+        :param rocket: object of class Rocket from sandbox
+        """
+        if rocket.version == self.version:
+            return
+        self.version = rocket.version
+        assembly = tuple(sorted(str(part.part_id) for part in rocket.parts))
+        if assembly not in self.cache:
+            self.cache[assembly] = self.render(rocket.get_active_parameters())
+        self.lines = self.cache[assembly]
+
+    def render(self, parameters):
+        """
+        Rendering texts for rocket characteristics
+        :param parameters: [initial_mass, exhaust_speed, fuel_consumption, capacity, fuel] from
+        Rocket.get_active_parameters
+        :return: list of rendered lines
+        """
+        mass, exhaust_speed, fuel_consumption, capacity, fuel = parameters
+        if mass <= 0:
+            return []
+        delta_v, twr, burn_time, valid = design_space.performance(mass, exhaust_speed, fuel_consumption, fuel)
+        if not valid:
+            texts = ["Delta-v: fuel > mass"]
+        else:
+            altitude = design_space.orbit_altitude(delta_v)
+            if altitude != altitude:
+                orbit = "none"
+            elif altitude == float("inf"):
+                orbit = "escape"
+            else:
+                orbit = f"{altitude / 1000:.0f} km"
+            texts = [f"Delta-v: {delta_v:.0f} m/s", f"Orbit: {orbit}"]
+        texts += [f"TWR: {twr:.2f}", f"Burn time: {burn_time:.0f} s"]
+        return [self.font.render(text, True, "#b68f40") for text in texts]
+
+    def blit(self, screen):
+        """
+        Adding texts to the screen
+        :param screen: screen
+        """
+        for i, line in enumerate(self.lines):
+            screen.blit(line, (self.x, self.y + i * (self.size + 10)))
 
 
 def upload_parts(arr, size):
@@ -284,7 +338,6 @@ def upload_parts(arr, size):
     :param size: texture width, used to choose right parts in terms of rocket width
     """
     for part in arr:
-        part.resize()
         part.blit()
         part.update(size)
 
@@ -315,15 +368,17 @@ def music_buttons_control(events, text_array):
             sys.exit()
         if event.type == pygame.MOUSEBUTTONDOWN:
             if play_music_button.check_for_input(menu_mouse_pos):
-                pygame.mixer.music.stop()
-                if pygame.mixer.music.get_busy() is False:
-                    pygame.mixer.music.load(playlist[random.randint(0, 6)])
-                    pygame.mixer.music.play(loops=0)
+                music = assets.mixer().music
+                music.stop()
+                if music.get_busy() is False:
+                    music.load(playlist[random.randint(0, 6)])
+                    music.play(loops=0)
             if pause_music_button.check_for_input(menu_mouse_pos):
-                if pygame.mixer.music.get_busy():
-                    pygame.mixer.music.pause()
+                music = assets.mixer().music
+                if music.get_busy():
+                    music.pause()
                 else:
-                    pygame.mixer.music.unpause()
+                    music.unpause()
 
 
 def gameplay_check_events(screen, events, mouse_pos, text, rocket, parts_arr, part_choose, menu):
@@ -349,21 +404,19 @@ def gameplay_check_events(screen, events, mouse_pos, text, rocket, parts_arr, pa
                 screen.fill((0, 0, 0, 0))
             if text[1].check_for_input(mouse_pos):
                 part_choose = ["engine", 0]
-                rocket.parts.clear()
-                rocket.surface = pygame.Surface([rocket.width, rocket.height], pygame.SRCALPHA)
+                rocket.clear()
             if text[2].check_for_input(mouse_pos):
                 menu = "main menu"
             for segments in parts_arr:
-                for part in segments.arr:
-                    if part.check_for_input(mouse_pos) and (
-                            (part_choose[1] == 0) or (part.entity.texture.get_size()[0] == part_choose[1])):
+                for part in segments.compatible(part_choose[1]):
+                    if part.check_for_input(mouse_pos):
                         match part_choose[0]:
                             case "engine":
                                 part_choose[1] = part.entity.texture.get_size()[0]
                                 part_choose[0] = "capsule"
                             case "capsule":
                                 part_choose[0] = "fuel tank"
-                        rocket.add_part(part.entity)
+                        rocket.add_part(copy.copy(part.entity))
 
     return menu, part_choose, rocket
 
@@ -384,18 +437,7 @@ def gameplay_buttons_control(screen, menu, width, height, rocket, events, text_a
 
     menu_mouse_pos = pygame.mouse.get_pos()
 
-    create_rocket = Parts(width / 2, 40, screen)
-    capsule = Cabin(screen, width, height, rocket=rocket)
-    tanks = Tanks(screen, width, height, rocket=rocket)
-    engines = Engines(screen, width, height, rocket=rocket)
-    parts_array = [create_rocket]
-    match part_choose[0]:
-        case "engine":
-            parts_array.append(engines)
-        case "fuel tank":
-            parts_array.append(tanks)
-        case "capsule":
-            parts_array.append(capsule)
+    parts_array = [catalog["title"], catalog[part_choose[0]]]
 
     upload_parts(parts_array, part_choose[1])
 
@@ -411,23 +453,42 @@ def text_buttons_define(width, height):
     :param width: screen width
     :param height: screen height
     """
-    play_button = ButtonText(image=pygame.transform.scale(pygame.image.load("textures/menu/Play Rect.png"), (100, 20)),
+    play_button = ButtonText(image=pygame.transform.scale(assets.image("textures/menu/Play Rect.png"), (100, 20)),
                              pos=(width - 100, height - 100), text_input="PLAY")
     restart_button = ButtonText(
-        image=pygame.transform.scale(pygame.image.load("textures/menu/Play Rect.png"), (190, 20)),
+        image=pygame.transform.scale(assets.image("textures/menu/Play Rect.png"), (190, 20)),
         pos=(width - 100, height - 150), text_input="RESTART")
-    back_button = ButtonText(image=pygame.transform.scale(pygame.image.load("textures/menu/Play Rect.png"), (100, 20)),
+    back_button = ButtonText(image=pygame.transform.scale(assets.image("textures/menu/Play Rect.png"), (100, 20)),
                              pos=(width - 100, height - 50), text_input="BACK")
     play_music_button = ButtonText(
-        image=pygame.transform.scale(pygame.image.load("textures/menu/Play Rect.png"), (350, 40)),
+        image=pygame.transform.scale(assets.image("textures/menu/Play Rect.png"), (350, 40)),
         pos=(width - 225, 50), text_input="Play Random Song")
     pause_music_button = ButtonText(
-        image=pygame.transform.scale(pygame.image.load("textures/menu/Play Rect.png"), (350, 40)),
+        image=pygame.transform.scale(assets.image("textures/menu/Play Rect.png"), (350, 40)),
         pos=(width - 225, 100), text_input="Pause/Continue")
 
     return [play_button, restart_button, back_button, play_music_button, pause_music_button]
 
 
+def create_catalog(screen, width, height, rocket):
+    """
+    Creating part menus and text buttons of the sandbox. Textures are loaded and scaled only once
+    :param screen: screen
+    :param width: screen width
+    :param height: screen height
+    :param rocket: object of class Rocket from sandbox
+    """
+    catalog["title"] = Parts(width / 2, 40, screen)
+    catalog["engine"] = Engines(screen, width, height, rocket=rocket)
+    catalog["capsule"] = Cabin(screen, width, height, rocket=rocket)
+    catalog["fuel tank"] = Tanks(screen, width, height, rocket=rocket)
+    for part in catalog.values():
+        part.resize()
+        part.index()
+    catalog["text"] = text_buttons_define(width, height)
+    catalog["readout"] = PerformanceReadout(width - 400, 150)
+
+
 def sandbox(screen, menu, width, height, rocket, events, part_choose):
     """
     The main function of sandbox_menu.py
@@ -440,13 +501,17 @@ def sandbox(screen, menu, width, height, rocket, events, part_choose):
     :param part_choose:  part of a rocket, which is being selected in this particular moment, with the size of a texture
     :return: menu, rocket, part_choose
     """
-    screen.blit(BG, (0, 0))
+    screen.blit(assets.image(BACKGROUND), (0, 0))
 
-    text_array = text_buttons_define(width, height)
+    if not catalog:
+        create_catalog(screen, width, height, rocket)
+    text_array = catalog["text"]
     upload_text(text_array, screen)
 
     menu, part_choose = gameplay_buttons_control(screen, menu, width, height, rocket, events, text_array, part_choose)
     music_buttons_control(events, text_array)
+    catalog["readout"].update(rocket)
+    catalog["readout"].blit(screen)
 
     rocket.recount()
     screen.blit(rocket.surface, (width / 2, 100))
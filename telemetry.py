@@ -0,0 +1,178 @@
+import argparse
+import queue
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+PORT = 47800
+RATE = 10
+"""Number of datagrams sent per second"""
+QUEUE_SIZE = 1024
+MAGIC = b"SFT1"
+HEADER = struct.Struct("<4sIH")
+"""Datagram header: magic, sequence number, number of records"""
+RECORD = np.dtype([("time", "<f8"), ("x", "<f8"), ("y", "<f8"), ("vx", "<f4"), ("vy", "<f4"),
+                   ("altitude", "<f4"), ("speed", "<f4"), ("angle", "<f4"), ("engine_power", "<f4"),
+                   ("fuel_remained", "<f4"), ("mass", "<f4"), ("flags", "u1")])
+"""Telemetry record, 57 bytes"""
+MAX_RECORDS = (1400 - HEADER.size) // RECORD.itemsize
+"""Number of records in one datagram, so it fits into one Ethernet frame"""
+ENGINE_ON = 1
+LANDED = 2
+COLLIDED = 4
+
+
+def telemetry_record(engine, rocket):
+    """
+    Returns the state of the flight as a tuple of RECORD fields
+    :param engine: object of class PhysicsEngine from trajectory_calculation
+    :param rocket: object of class Rocket from sandbox
+    """
+    parameters = engine.rocket_parameters
+    x, y, vx, vy = parameters.parameters
+    flags = ENGINE_ON * bool(parameters.engine_is_on_flag and parameters.engine_power > 0 and
+                             not parameters.is_empty()) + \
+        LANDED * bool(parameters.landed_flag) + COLLIDED * bool(parameters.collision_flag)
+    return (parameters.current_time, x, y, vx, vy, (x * x + y * y) ** 0.5 - engine.constants.rad_Earth,
+            (vx * vx + vy * vy) ** 0.5, rocket.angle, parameters.engine_power, parameters.fuel_remained,
+            parameters.current_stage_mass, flags)
+
+
+def pack(sequence, records):
+    """
+    Returns datagram with records
+    :param sequence: number of the datagram
+    :param records: list of tuples of RECORD fields
+    """
+    return HEADER.pack(MAGIC, sequence, len(records)) + np.array(records, dtype=RECORD).tobytes()
+
+
+def unpack(datagram):
+    """
+    Reading datagram
+    :param datagram: bytes received from the publisher
+    :return: sequence number, array of RECORD
+    """
+    magic, sequence, count = HEADER.unpack_from(datagram)
+    if magic != MAGIC:
+        raise ValueError("not a telemetry datagram")
+    return sequence, np.frombuffer(datagram, dtype=RECORD, count=count, offset=HEADER.size)
+
+
+class TelemetryPublisher(threading.Thread):
+    """
+    Worker thread, which sends telemetry records to a UDP port in batches. Records are added to a bounded queue,
+    which drops new records when it is full, so the main loop never waits for the network
+    """
+
+    def __init__(self, host="127.0.0.1", port=PORT, rate=RATE, queue_size=QUEUE_SIZE):
+        """
+        Initializing publisher
+        :param host: address of the receiver
+        :param port: UDP port of the receiver
+        :param rate: number of batches sent per second
+        :param queue_size: number of records, which can wait for sending
+        """
+        threading.Thread.__init__(self, name="telemetry", daemon=True)
+        self.address = (host, port)
+        self.period = 1 / rate
+        self.records = queue.Queue(maxsize=queue_size)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.sequence = 0
+        self.dropped = 0
+        self.sent = 0
+        self.running = True
+
+    def publish(self, engine, rocket):
+        """
+        Adding the current state of the flight to the queue, the state is dropped if the queue is full
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param rocket: object of class Rocket from sandbox
+        """
+        try:
+            self.records.put_nowait(telemetry_record(engine, rocket))
+        except queue.Full:
+            self.dropped += 1
+
+    def send(self):
+        """
+        Sending all queued records
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        for first in range(0, len(batch), MAX_RECORDS):
+            try:
+                self.socket.sendto(pack(self.sequence, batch[first:first + MAX_RECORDS]), self.address)
+                self.sent += len(batch[first:first + MAX_RECORDS])
+            except OSError:
+                self.dropped += len(batch[first:first + MAX_RECORDS])
+            self.sequence += 1
+
+    def run(self):
+        """
+        Sending queued records with the fixed rate until close is called
+        """
+        next_time = time.perf_counter()
+        while self.running:
+            next_time += self.period
+            time.sleep(max(next_time - time.perf_counter(), 0))
+            self.send()
+        self.send()
+        self.socket.close()
+
+    def close(self):
+        """
+        Sending the remaining records and stopping the thread
+        """
+        self.running = False
+        self.join()
+
+
+def listen(port=PORT, duration=None):
+    """
+    Test client, which prints received records and counts lost datagrams
+    :param port: UDP port
+    :param duration: time to listen in seconds, forever if None
+    """
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", port))
+    receiver.settimeout(1)
+    expected = None
+    lost = 0
+    received = 0
+    start = time.perf_counter()
+    while duration is None or time.perf_counter() - start < duration:
+        try:
+            datagram = receiver.recv(65536)
+        except socket.timeout:
+            continue
+        sequence, records = unpack(datagram)
+        if expected is not None and sequence > expected:
+            lost += sequence - expected
+        expected = sequence + 1
+        received += len(records)
+        if len(records) > 0:
+            last = records[-1]
+            print(f"#{sequence} {len(records)} records, t = {last['time']:.1f} s, "
+                  f"altitude = {last['altitude'] / 1000:.2f} km, speed = {last['speed']:.1f} m/s, "
+                  f"power = {last['engine_power']:.0f}, fuel = {last['fuel_remained']:.0f}, flags = {last['flags']}, "
+                  f"lost datagrams: {lost}")
+    receiver.close()
+    return received, lost
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print telemetry sent by main.py --telemetry")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--duration", type=float, default=None, help="time to listen in seconds")
+    args = parser.parse_args()
+
+    listen(args.port, args.duration)
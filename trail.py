@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+
+class Trail:
+    """
+    Path flown by a vehicle, stored in an array of fixed capacity. Points are decimated as they arrive: a point is
+    kept only when the path can not be replaced by a straight segment from the last kept point without leaving the
+    tolerance. When the array is full, the tolerance is doubled and the kept points are decimated again, so memory
+    stays bounded for flights of any length
+    """
+
+    def __init__(self, capacity=2048, tolerance=1.0):
+        """
+        Initializing trail
+        :param capacity: maximum number of kept points
+        :param tolerance: initial maximum distance between the flown path and the drawn one, in metres
+        """
+        self.points = np.zeros((capacity, 2))
+        self.count = 0
+        self.tolerance = tolerance
+        self.requested_tolerance = tolerance
+        self.decimated_tolerance = 0
+        self.last = None
+        self.reference = 0.0
+        self.low = -math.pi
+        self.high = math.pi
+
+    def clear(self):
+        """
+        Removing all points
+        """
+        self.count = 0
+        self.last = None
+        self.decimated_tolerance = 0
+        self.tolerance = self.requested_tolerance
+
+    def set_tolerance(self, tolerance):
+        """
+        Changing tolerance for the new points, it can not be less than the tolerance reached by decimation
+        :param tolerance: maximum distance between the flown path and the drawn one, in metres
+        """
+        self.requested_tolerance = tolerance
+        self.tolerance = max(self.decimated_tolerance, tolerance)
+
+    def reset_cone(self):
+        """
+        Allowing any direction of the next segment
+        """
+        self.reference = 0.0
+        self.low = -math.pi
+        self.high = math.pi
+
+    def add(self, point):
+        """
+        Adding point of the flown path. The directions from the last kept point, in which a segment passes within
+        tolerance of all skipped points, form a cone. The last point is kept when the new one leaves the cone
+        :param point: [x, y] coordinates
+        """
+        x, y = float(point[0]), float(point[1])
+        if self.count == 0:
+            self.keep(x, y)
+            return
+        anchor_x, anchor_y = self.points[self.count - 1]
+        distance = math.hypot(x - anchor_x, y - anchor_y)
+        if distance <= self.tolerance:
+            if self.last is None:
+                self.last = (x, y)
+            return
+        angle = math.atan2(y - anchor_y, x - anchor_x)
+        if self.last is None or self.low == -math.pi and self.high == math.pi:
+            self.reference = angle
+        relative = (angle - self.reference + math.pi) % (2 * math.pi) - math.pi
+        if self.low <= relative <= self.high:
+            half = math.asin(self.tolerance / distance)
+            self.low = max(self.low, relative - half)
+            self.high = min(self.high, relative + half)
+            self.last = (x, y)
+            return
+        self.keep(*self.last)
+        self.add(point)
+
+    def keep(self, x, y):
+        """
+        Adding point to the array, decimating the array if it is full
+        :param x: x coordinate
+        :param y: y coordinate
+        """
+        if self.count == len(self.points):
+            self.decimate()
+        self.points[self.count] = x, y
+        self.count += 1
+        self.last = None
+        self.reset_cone()
+
+    def decimate(self):
+        """
+        Doubling tolerance and decimating kept points again, until the array is at most half full. The last kept
+        point stays the same, so the points added after it are not changed. Errors of the decimations add up, so
+        the drawn path is within two tolerances of the flown one
+        """
+        last, cone = self.last, (self.reference, self.low, self.high)
+        while self.count > len(self.points) // 2:
+            self.tolerance *= 2
+            points = self.points[:self.count].copy()
+            self.count = 0
+            self.last = None
+            self.reset_cone()
+            for point in points[:-1]:
+                self.add(point)
+            if self.last is not None:
+                self.keep(*self.last)
+            self.points[self.count] = points[-1]
+            self.count += 1
+        self.decimated_tolerance = self.tolerance
+        self.last = last
+        self.reference, self.low, self.high = cone
+
+    def path(self, position=None):
+        """
+        Returns kept points and the last added point
+        :param position: current position of the vehicle, added to the end of the path if not None
+        :return: array [n, 2] of coordinates
+        """
+        tail = [p for p in (self.last, position) if p is not None]
+        if not tail:
+            return self.points[:self.count]
+        return np.concatenate([self.points[:self.count], np.array(tail, dtype=float).reshape((-1, 2))])
@@ -1,5 +1,51 @@
+import time
+
 import numpy as np
 
+BODIES = ("Earth", "Moon")
+CONTACT_CHECK = 32
+"""Number of predicative points calculated between two checks for contact"""
+PREDICTION_POSITION_TOLERANCE = 1000
+"""Budgeted predicative orbit is calculated again when the rocket is farther than this from it, in metres"""
+PREDICTION_VELOCITY_TOLERANCE = 1
+"""or when the velocity of the rocket differs from it more than this, in m/s"""
+STANDARD_ATMOSPHERE = ((0, 1.225), (1.1e4, 3.639e-1), (2e4, 8.803e-2), (3.2e4, 1.322e-2), (4.7e4, 1.427e-3),
+                       (5.1e4, 8.616e-4), (7.1e4, 6.421e-5), (8.6e4, 6.958e-6), (1e5, 5.604e-7), (1.2e5, 2.222e-8))
+"""Air density of the US Standard Atmosphere 1976 in kg/m^3 at the boundaries of its layers"""
+ATMOSPHERE_CUTOFF = 1.2e5
+"""Drag is not calculated above this altitude in metres"""
+ATMOSPHERE_STEP = 100
+"""Altitude step of DENSITY_TABLE in metres"""
+DENSITY_TABLE = np.exp(np.interp(np.arange(0, ATMOSPHERE_CUTOFF + 2 * ATMOSPHERE_STEP, ATMOSPHERE_STEP),
+                                 [layer[0] for layer in STANDARD_ATMOSPHERE],
+                                 np.log([layer[1] for layer in STANDARD_ATMOSPHERE])))
+"""Air density at altitudes 0, ATMOSPHERE_STEP, 2 * ATMOSPHERE_STEP, ..., exponential inside the layers"""
+
+
+def atmosphere_density(altitude):
+    """
+    Returns air density linearly interpolated in DENSITY_TABLE. The table has a constant step, so the index is
+    calculated directly. Works both with numbers and numpy arrays
+    :param altitude: altitude above Earth in metres, not more than ATMOSPHERE_CUTOFF, negative is taken as 0
+    """
+    position = np.maximum(altitude, 0) / ATMOSPHERE_STEP
+    i = position.astype(int)
+    return DENSITY_TABLE[i] + (DENSITY_TABLE[i + 1] - DENSITY_TABLE[i]) * (position - i)
+
+
+def calc_drag(states, altitude, drag_factor):
+    """
+    Calculating acceleration by atmospheric drag, -density * |v| * v * drag_factor. The atmosphere does not move,
+    as Earth does not rotate. Works both with one state and [n, 4] arrays
+    :param states: [x, y, vx, vy] array or [n, 4] array
+    :param altitude: altitude or [n] array of altitudes, not more than ATMOSPHERE_CUTOFF
+    :param drag_factor: drag_coefficient * cross_section / (2 * mass), number or [n] array
+    :return: [ax, ay] array or [n, 2] array
+    """
+    velocity = states[..., 2:]
+    return -(atmosphere_density(altitude) * np.hypot(velocity[..., 0], velocity[..., 1]) *
+             drag_factor)[..., None] * velocity
+
 
 class Constants:
     """
@@ -22,6 +68,10 @@ class Constants:
         self.moon_period = 27.3 * 24 * 3600 / 2 / np.pi
         self.initial_fas = 99 / 180 * np.pi
         self.log_size = 500
+        self.landing_speed = 10
+        self.drag_coefficient = 0.5
+        self.cross_section = 0.0
+        self.prediction_budget = None
 
         self.gas_exhaust_speed = gas_exhaust_speed
         self.fuel_consumption = fuel_consumption
@@ -31,6 +81,108 @@ class Constants:
         self.step = 0.5
 
 
+class Contact:
+    """
+    Contact of a rocket with the surface of Earth or Moon
+    """
+
+    def __init__(self, body, parameters, velocity, time, longitude, landing_speed):
+        """
+        Initializing Contact class
+        :param body: 0 for Earth, 1 for Moon
+        :param parameters: [x, y, vx, vy] array of rocket coordinates and velocity at the moment of contact
+        :param velocity: [vx, vy] array of rocket velocity relative to the body
+        :param time: time of contact
+        :param longitude: angle of the contact point on the body surface in degrees, counted from Ox axis
+        :param landing_speed: maximum speed of landing, faster contact is a crash
+        """
+        self.body = body
+        self.parameters = parameters
+        self.position = parameters[:2]
+        self.velocity = velocity
+        self.speed = np.linalg.norm(velocity)
+        self.time = time
+        self.longitude = longitude
+        self.landed = self.speed <= landing_speed
+
+    def __str__(self):
+        action = "Landed on" if self.landed else "Crashed into"
+        return f"{action} {BODIES[self.body]} at {self.speed:.1f} m/s, longitude {self.longitude:.1f}, " \
+               f"time {self.time:.1f} s"
+
+
+class OrbitalElements:
+    """
+    Elements of the Kepler orbit around Earth, which the rocket would follow without engine and Moon
+    """
+
+    def __init__(self, parameters, mu, radius, time=0.0):
+        """
+        Calculating orbital elements from the state vector
+        :param parameters: [x, y, vx, vy] array of rocket coordinates and velocity
+        :param mu: gravitational parameter of the central body
+        :param radius: radius of the central body, altitudes are counted from its surface
+        :param time: time of the state
+        """
+        position, velocity = parameters[:2], parameters[2:]
+        distance = np.hypot(*position)
+        speed_squared = np.dot(velocity, velocity)
+        self.time = time
+        self.energy = speed_squared / 2 - mu / distance
+        self.angular_momentum = position[0] * velocity[1] - position[1] * velocity[0]
+        eccentricity = ((speed_squared - mu / distance) * position - np.dot(position, velocity) * velocity) / mu
+        self.eccentricity = np.hypot(*eccentricity)
+        self.semi_major_axis = -mu / (2 * self.energy) if self.energy != 0 else np.inf
+        self.periapsis = self.angular_momentum ** 2 / (mu * (1 + self.eccentricity)) - radius
+        self.bound = self.energy < 0
+        self.apoapsis = self.semi_major_axis * (1 + self.eccentricity) - radius if self.bound else np.inf
+        self.period = 2 * np.pi * np.sqrt(self.semi_major_axis ** 3 / mu) if self.bound else np.inf
+
+        cos_anomaly = np.dot(eccentricity, position) / (self.eccentricity * distance) if self.eccentricity > 0 else 1
+        anomaly = np.arccos(np.clip(cos_anomaly, -1, 1))
+        if np.dot(position, velocity) < 0:
+            anomaly = 2 * np.pi - anomaly
+        if self.bound:
+            eccentric = 2 * np.arctan(np.sqrt((1 - self.eccentricity) / (1 + self.eccentricity)) * np.tan(anomaly / 2))
+            mean = (eccentric - self.eccentricity * np.sin(eccentric)) % (2 * np.pi)
+            motion = 2 * np.pi / self.period
+            self.time_to_periapsis = (-mean % (2 * np.pi)) / motion
+            self.time_to_apoapsis = ((np.pi - mean) % (2 * np.pi)) / motion
+        else:
+            self.time_to_apoapsis = np.inf
+            self.time_to_periapsis = np.inf
+            if self.eccentricity > 1 and anomaly > np.pi:
+                hyperbolic = 2 * np.arctanh(np.sqrt((self.eccentricity - 1) / (self.eccentricity + 1)) *
+                                            np.tan(anomaly / 2))
+                mean = self.eccentricity * np.sinh(hyperbolic) - hyperbolic
+                self.time_to_periapsis = -mean / np.sqrt(mu / -self.semi_major_axis ** 3)
+
+    def time_to_apsides(self, time):
+        """
+        Returns times to apoapsis and periapsis at a later moment, the orbit is supposed to be the same
+        :param time: time of calculation
+        :return: time to apoapsis, time to periapsis
+        """
+        passed = time - self.time
+        if not self.bound:
+            return self.time_to_apoapsis, self.time_to_periapsis - passed
+        return (self.time_to_apoapsis - passed) % self.period, (self.time_to_periapsis - passed) % self.period
+
+    def is_close(self, parameters, mu, tolerance=1e-6):
+        """
+        Checking whether a state vector has almost the same energy and angular momentum, so the elements do not
+        need to be calculated again
+        :param parameters: [x, y, vx, vy] array of rocket coordinates and velocity
+        :param mu: gravitational parameter of the central body
+        :param tolerance: relative tolerance
+        """
+        x, y, vx, vy = parameters
+        energy = (vx * vx + vy * vy) / 2 - mu / (x * x + y * y) ** 0.5
+        angular_momentum = x * vy - y * vx
+        return abs(energy - self.energy) <= tolerance * abs(self.energy) and \
+            abs(angular_momentum - self.angular_momentum) <= tolerance * abs(self.angular_momentum)
+
+
 class RocketParameters:
 
     def __init__(self, initial_parameters, initial_rocket_mass, tanks_fullness):
@@ -41,9 +193,14 @@ class RocketParameters:
         :param tanks_fullness: mass of fuel stored in tanks
         """
         self.parameters = np.array(initial_parameters)
+        self.previous_parameters = self.parameters.copy()
         self.direction = np.array([1, 0])
         self.current_time = 0.0
+        self.previous_time = 0.0
         self.predictive_orbit = np.ndarray(shape=(0, 4), dtype=float)
+        self.predictive_times = np.ndarray(shape=0, dtype=float)
+        self.predicted_contact = None
+        self.contact = None
 
         self.current_stage_mass = initial_rocket_mass
         self.fuel_remained = tanks_fullness
@@ -51,6 +208,7 @@ class RocketParameters:
 
         self.engine_is_on_flag = True
         self.collision_flag = False
+        self.landed_flag = False
 
     def is_empty(self):
         """
@@ -58,6 +216,15 @@ class RocketParameters:
         """
         return self.fuel_remained <= 0
 
+    def interpolate(self, alpha):
+        """
+        Calculating rocket state between the two last physics steps, used for smooth rendering
+        :param alpha: 0 for the previous step, 1 for the current one
+        :return: [x, y, vx, vy] array, time
+        """
+        return self.previous_parameters + (self.parameters - self.previous_parameters) * alpha, \
+            self.previous_time + (self.current_time - self.previous_time) * alpha
+
 
 class PhysicsEngine:
 
@@ -74,13 +241,26 @@ class PhysicsEngine:
         """
         self.constants = Constants(gas_exhaust_speed, fuel_consumption, fuel_tank_capacity, initial_rocket_mass)
         self.rocket_parameters = RocketParameters(initial_parameters, initial_rocket_mass, tanks_fullness)
+        self.orbit_buffer = np.ndarray(shape=(self.constants.log_size, 4), dtype=float)
+        self.time_buffer = np.ndarray(shape=self.constants.log_size, dtype=float)
+        self.prediction_start = 0
+        self.prediction_count = 0
+        self.predicting = False
+        parameters = self.rocket_parameters
+        parameters.landed_flag = any(self.on_surface(body, parameters.parameters[:2], parameters.current_time)
+                                     for body in range(len(BODIES)))
 
     def set_predicative_orbit_log_size(self, new_size):
         """
-        Function to set the number of predicative points to be calculated on each step
+        Function to set the number of predicative points to be calculated on each step. Prediction buffers grow at
+        least twice, so changing the size often does not allocate memory every time
         :param new_size: number of points
         """
         self.constants.log_size = new_size
+        if new_size > len(self.orbit_buffer):
+            size = max(new_size, 2 * len(self.orbit_buffer))
+            self.orbit_buffer = np.ndarray(shape=(size, 4), dtype=float)
+            self.time_buffer = np.ndarray(shape=size, dtype=float)
 
     def set_rocket_direction(self, angle):
         """
@@ -123,18 +303,112 @@ class PhysicsEngine:
         self.rocket_parameters.engine_is_on_flag = flag
         self.rocket_parameters.engine_power = power
 
+    def detect_contacts(self, positions, times):
+        """
+        Checking many points for being under the surface of Earth or Moon
+        :param positions: [n, 2] array of coordinates
+        :param times: [n] array of moments of time
+        :return: [n] array of body numbers: -1 for points in space, 0 for Earth, 1 for Moon
+        """
+        bodies = np.full(len(positions), -1)
+        moon = positions - self.calc_moon_position(times).T
+        bodies[np.einsum("ij,ij->i", moon, moon) < self.constants.rad_Moon ** 2] = 1
+        bodies[np.einsum("ij,ij->i", positions, positions) < self.constants.rad_Earth ** 2] = 0
+        return bodies
+
+    def calc_body_state(self, body, time):
+        """
+        Calculating position and velocity of a body
+        :param body: 0 for Earth, 1 for Moon
+        :param time: time of calculation
+        :return: [x, y] array of coordinates, [vx, vy] array of velocity, radius
+        """
+        if body == 0:
+            return np.zeros(2), np.zeros(2), self.constants.rad_Earth
+        position = self.calc_moon_position(time)
+        return position, np.array([-position[1], position[0]]) / self.constants.moon_period, self.constants.rad_Moon
+
+    def calc_contact(self, outside, outside_time, inside, inside_time, body):
+        """
+        Finding the point, where the straight segment between two rocket states crosses the surface of a body
+        :param outside: [x, y, vx, vy] array of the rocket state above the surface
+        :param outside_time: time of the state above the surface
+        :param inside: [x, y, vx, vy] array of the rocket state under the surface
+        :param inside_time: time of the state under the surface
+        :param body: 0 for Earth, 1 for Moon
+        :return: object of class Contact
+        """
+        start = outside[:2] - self.calc_body_state(body, outside_time)[0]
+        end = inside[:2] - self.calc_body_state(body, inside_time)[0]
+        radius = self.calc_body_state(body, inside_time)[2]
+        delta = end - start
+        a = np.dot(delta, delta)
+        b = np.dot(start, delta)
+        c = np.dot(start, start) - radius ** 2
+        fraction = 0.0 if a == 0 else (-b - np.sqrt(max(b ** 2 - a * c, 0))) / a
+        fraction = min(max(fraction, 0.0), 1.0)
+
+        time = outside_time + (inside_time - outside_time) * fraction
+        parameters = outside + (inside - outside) * fraction
+        center, velocity, radius = self.calc_body_state(body, time)
+        relative = parameters[:2] - center
+        return Contact(body, parameters, parameters[2:] - velocity, time,
+                       np.rad2deg(np.arctan2(relative[1], relative[0])), self.constants.landing_speed)
+
+    def on_surface(self, body, position, time):
+        """
+        Checking whether a point is not higher than the surface of a body, the launch site is exactly on the surface
+        :param body: 0 for Earth, 1 for Moon
+        :param position: [x, y] array of coordinates
+        :param time: moment of time
+        """
+        center, _, radius = self.calc_body_state(body, time)
+        return np.linalg.norm(position - center) <= radius * (1 + 1e-9)
+
     def detect_collision(self):
         """
-        Function to detect collision with Earth
+        Function to detect collision with Earth and Moon. Slow contact is landing: the rocket is put on the surface
+        and moves together with the body. Fast contact is a crash, it sets collision_flag. A rocket, which was
+        already on the surface (landed or standing on the launch site), only stays on it, and the contact is removed
+        when the rocket leaves the surface
+        """
+        parameters = self.rocket_parameters
+        if parameters.collision_flag:
+            return
+        body = self.detect_contacts(parameters.parameters[None, :2], np.array([parameters.current_time]))[0]
+        if body < 0:
+            parameters.landed_flag = False
+            parameters.contact = None
+            return
+
+        center, velocity, radius = self.calc_body_state(body, parameters.current_time)
+        resting = parameters.landed_flag or \
+            self.on_surface(body, parameters.previous_parameters[:2], parameters.previous_time)
+        contact = None if resting else self.calc_contact(parameters.previous_parameters, parameters.previous_time,
+                                                         parameters.parameters, parameters.current_time, body)
+        if contact is not None:
+            parameters.contact = contact
+        if resting or contact.landed:
+            parameters.landed_flag = True
+            relative = parameters.parameters[:2] - center
+            parameters.parameters = np.concatenate([center + relative / np.linalg.norm(relative) * radius, velocity])
+        else:
+            parameters.collision_flag = True
+            parameters.parameters = contact.parameters.copy()
+
+    def calc_orbital_elements(self):
+        """
+        Calculating elements of the current orbit around Earth
+        :return: object of class OrbitalElements
         """
-        if np.linalg.norm(self.rocket_parameters.parameters[:2]) < self.constants.rad_Earth:
-            self.rocket_parameters.collision_flag = True
+        return OrbitalElements(self.rocket_parameters.parameters, self.constants.mu_Earth, self.constants.rad_Earth,
+                               self.rocket_parameters.current_time)
 
     def calc_moon_position(self, time):
         """
         Calculating moon position in the particular moment of time
         :param time: time of calculation
-        :return: array [x, y] of moon coordinates
+        :return: array [x, y] of moon coordinates, [2, n] array if time is an array
         """
         return self.constants.moon_rad * np.array(
             [np.cos(self.constants.initial_fas + time / self.constants.moon_period),
@@ -174,6 +448,17 @@ class PhysicsEngine:
 
         return - self.constants.mu_moon * rad_moon_ka / (np.linalg.norm(rad_moon_ka)) ** 3
 
+    def calc_acceleration_drag(self, parameters, position_norm):
+        """
+        Calculating acceleration by atmospheric drag, it must be called only below ATMOSPHERE_CUTOFF
+        :param parameters: [x, y, vx, vy] array consisting of rocket stage parameters
+        :param position_norm: the norm of vector earth-rocket
+        :return: [ax, ay] array consisting of acceleration values for each axis
+        """
+        return calc_drag(parameters, position_norm - self.constants.rad_Earth,
+                         self.constants.drag_coefficient * self.constants.cross_section /
+                         (2 * self.rocket_parameters.current_stage_mass))
+
     def calc_acceleration(self, parameters, time):
         """
         Calculating final value of vehicle acceleration
@@ -189,7 +474,11 @@ class PhysicsEngine:
 
         acceleration_moon = self.calc_acceleration_moon(parameters, time)
 
-        return acceleration_gravity + acceleration_engine + acceleration_moon
+        acceleration = acceleration_gravity + acceleration_engine + acceleration_moon
+        if position_norm < self.constants.rad_Earth + ATMOSPHERE_CUTOFF and self.constants.cross_section > 0:
+            acceleration += self.calc_acceleration_drag(parameters, position_norm)
+
+        return acceleration
 
     def calc_differential(self, parameters, time):
         """
@@ -213,10 +502,12 @@ class PhysicsEngine:
         k_3 = self.calc_differential(self.rocket_parameters.parameters + 0.5 * self.constants.step * k_2,
                                      self.rocket_parameters.current_time + 0.5 * self.constants.step)
         k_4 = self.calc_differential(self.rocket_parameters.parameters + self.constants.step * k_3,
-                                     self.rocket_parameters.current_time + 0.5 * self.constants.step)
+                                     self.rocket_parameters.current_time + self.constants.step)
 
         self.reduce_mass()
 
+        self.rocket_parameters.previous_parameters = self.rocket_parameters.parameters.copy()
+        self.rocket_parameters.previous_time = self.rocket_parameters.current_time
         self.rocket_parameters.parameters += (k_1 + 2 * (k_2 + k_3) + k_4) * self.constants.step / 6
         self.rocket_parameters.current_time += self.constants.step
 
@@ -227,8 +518,11 @@ class PhysicsEngine:
         :param time: time used in predicative calculations
         :return: predicative [vx, vy, ax, ay] array
         """
-        total_acceleration = self.calc_acceleration_earth(predicative_parameters, np.linalg.norm(
-            predicative_parameters[:2])) + self.calc_acceleration_moon(predicative_parameters, time)
+        position_norm = np.linalg.norm(predicative_parameters[:2])
+        total_acceleration = self.calc_acceleration_earth(predicative_parameters, position_norm) + \
+            self.calc_acceleration_moon(predicative_parameters, time)
+        if position_norm < self.constants.rad_Earth + ATMOSPHERE_CUTOFF and self.constants.cross_section > 0:
+            total_acceleration += self.calc_acceleration_drag(predicative_parameters, position_norm)
 
         return np.array([predicative_parameters[2], predicative_parameters[3], total_acceleration[0],
                          total_acceleration[1]])
@@ -242,32 +536,136 @@ class PhysicsEngine:
         """
         return \
             predicative_parameters + self.calc_differential_euler(predicative_parameters, time) * \
-            self.constants.step * 20, time + self.constants.step * 5
+            self.constants.step * 20, time + self.constants.step * 20
+
+    def propagate(self, predicative_orbit, time_array, log_size, count=1, deadline=None):
+        """
+        Function to calculate points of a free flight after the calculated points of the arrays. Points are checked
+        for contact with Earth and Moon in blocks of CONTACT_CHECK, the flight ends at the first contact
+        :param predicative_orbit: [n, 4] array, the first count rows are calculated, other rows are filled
+        :param time_array: [n] array, the first count elements are calculated, other elements are filled
+        :param log_size: number of points to calculate, not more than n
+        :param count: number of calculated points, the first row is the initial [x, y, vx, vy]
+        :param deadline: value of time.perf_counter, after which no new block is started, None for no limit
+        :return: number of calculated points, object of class Contact or None
+        """
+        count -= 1
+        while count < log_size - 1 and (deadline is None or time.perf_counter() < deadline):
+            first = count + 1
+            for count in range(first, min(first + CONTACT_CHECK, log_size)):
+                predicative_orbit[count], time_array[count] = self.calc_step_euler(predicative_orbit[count - 1],
+                                                                                   time_array[count - 1])
+            bodies = self.detect_contacts(predicative_orbit[first:count + 1, :2], time_array[first:count + 1])
+            inside = np.flatnonzero(bodies >= 0)
+            if len(inside) > 0:
+                count = first + inside[0]
+                contact = self.calc_contact(predicative_orbit[count - 1], time_array[count - 1],
+                                            predicative_orbit[count], time_array[count], bodies[inside[0]])
+                predicative_orbit[count] = contact.parameters
+                return count + 1, contact
+        return count + 1, None
 
     def calc_predicative_orbit(self):
         """
-        Function to calculate predicative orbit
-        :return: array [[x, y, vx, vy], ...] consisting of predicative orbit points
-        """
+        Function to calculate predicative orbit, which ends at the first contact with Earth or Moon. Points are
+        written to the buffers of the engine, predictive_orbit and predictive_times are views of the buffers and are
+        overwritten by the next call. If constants.prediction_budget is set, the orbit is extended within the
+        budget, see extend_predicative_orbit. While the rocket stands on a surface, the orbit is empty
+        """
+        if self.rocket_parameters.landed_flag:
+            self.clear_predicative_orbit()
+            return
+        if self.constants.prediction_budget is not None:
+            self.extend_predicative_orbit(self.constants.prediction_budget)
+            return
         log_size = self.constants.log_size
-        time_array = np.zeros(log_size)
-        time_array[0] = self.rocket_parameters.current_time
-        predicative_orbit = np.ndarray(shape=(log_size, 4), dtype=float)
-        predicative_orbit[0] = self.rocket_parameters.parameters
-        count = 0
-
-        while count < log_size - 1 and not np.linalg.norm(predicative_orbit[count][:2]) < self.constants.rad_Earth:
-            count += 1
-            predicative_orbit[count], time_array[count] = self.calc_step_euler(predicative_orbit[count - 1],
-                                                                               time_array[count - 1])
-
-        predicative_orbit = np.resize(predicative_orbit, (count, 4))
-        self.rocket_parameters.predictive_orbit = predicative_orbit
+        if log_size > len(self.orbit_buffer):
+            self.set_predicative_orbit_log_size(log_size)
+        self.time_buffer[0] = self.rocket_parameters.current_time
+        self.orbit_buffer[0] = self.rocket_parameters.parameters
+        count, self.rocket_parameters.predicted_contact = self.propagate(self.orbit_buffer, self.time_buffer, log_size)
+
+        self.rocket_parameters.predictive_orbit = self.orbit_buffer[:count]
+        self.rocket_parameters.predictive_times = self.time_buffer[:count]
+        self.prediction_start, self.prediction_count = 0, count
+        self.predicting = False
+
+    def clear_predicative_orbit(self):
+        """
+        Function to clear predicative orbit and predicted contact, free flight from a surface would go through it and
+        show a crash. The orbit is calculated from the beginning after liftoff
+        """
+        parameters = self.rocket_parameters
+        parameters.predictive_orbit = self.orbit_buffer[:0]
+        parameters.predictive_times = self.time_buffer[:0]
+        parameters.predicted_contact = None
+        self.prediction_start = self.prediction_count = 0
+        self.predicting = False
+
+    def prediction_changed(self):
+        """
+        Checking whether the predicative orbit must be calculated from the beginning: the engine works, the current
+        time is not inside the orbit or the rocket is not on the orbit within the tolerances
+        """
+        parameters = self.rocket_parameters
+        start, count = self.prediction_start, self.prediction_count
+        if count - start < 2 or self.calc_acceleration_engine().any():
+            return True
+        times = self.time_buffer[start:count]
+        current_time = parameters.current_time
+        if not times[0] <= current_time < times[-1]:
+            return True
+        i = start + int(np.searchsorted(times, current_time, side="right"))
+        fraction = (current_time - self.time_buffer[i - 1]) / (self.time_buffer[i] - self.time_buffer[i - 1])
+        expected = self.orbit_buffer[i - 1] + (self.orbit_buffer[i] - self.orbit_buffer[i - 1]) * fraction
+        difference = parameters.parameters - expected
+        return np.hypot(*difference[:2]) > PREDICTION_POSITION_TOLERANCE or \
+            np.hypot(*difference[2:]) > PREDICTION_VELOCITY_TOLERANCE
+
+    def extend_predicative_orbit(self, budget):
+        """
+        Function to calculate predicative orbit within a time budget. The orbit is kept between calls: passed points
+        are dropped, the point before the current time is replaced by the rocket state and new points are added
+        until log_size points are ahead of the rocket, the first contact is found or the budget is spent. The orbit
+        is calculated from the beginning only when prediction_changed, so long orbits appear in several frames
+        :param budget: time in seconds, which the call may spend on new points
+        """
+        deadline = time.perf_counter() + budget
+        log_size = self.constants.log_size
+        parameters = self.rocket_parameters
+        if len(self.orbit_buffer) < 2 * log_size:
+            self.orbit_buffer = np.ndarray(shape=(2 * log_size, 4), dtype=float)
+            self.time_buffer = np.ndarray(shape=2 * log_size, dtype=float)
+            self.prediction_start = self.prediction_count = 0
+
+        if self.prediction_changed():
+            self.prediction_start, self.prediction_count = 0, 1
+            parameters.predicted_contact = None
+        else:
+            self.prediction_start += int(np.searchsorted(self.time_buffer[self.prediction_start:self.prediction_count],
+                                                         parameters.current_time, side="right")) - 1
+        start = self.prediction_start
+        self.orbit_buffer[start] = parameters.parameters
+        self.time_buffer[start] = parameters.current_time
+
+        self.predicting = parameters.predicted_contact is None and self.prediction_count < start + log_size
+        if self.predicting:
+            if start + log_size > len(self.orbit_buffer):
+                count = self.prediction_count - start
+                self.orbit_buffer[:count] = self.orbit_buffer[start:self.prediction_count]
+                self.time_buffer[:count] = self.time_buffer[start:self.prediction_count]
+                self.prediction_start, self.prediction_count, start = 0, count, 0
+            self.prediction_count, parameters.predicted_contact = self.propagate(
+                self.orbit_buffer, self.time_buffer, start + log_size, self.prediction_count, deadline)
+            self.predicting = parameters.predicted_contact is None and self.prediction_count < start + log_size
+
+        parameters.predictive_orbit = self.orbit_buffer[start:self.prediction_count]
+        parameters.predictive_times = self.time_buffer[start:self.prediction_count]
 
     def process_step(self):
         """
         Function to process step
         """
         self.calc_step()
-        self.calc_predicative_orbit()
         self.detect_collision()
+        self.calc_predicative_orbit()
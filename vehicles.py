@@ -0,0 +1,211 @@
+import numpy as np
+
+import trajectory_calculation
+
+
+class Scene:
+    """
+    Vehicles simulated together with the controlled rocket. State of every vehicle is stored in component arrays,
+    one row per vehicle, so all vehicles are integrated and drawn at once. The controlled vehicle is simulated by
+    PhysicsEngine and its row is updated only when control is switched
+    """
+
+    def __init__(self, engine, capacity=16):
+        """
+        Initializing scene, the rocket of the engine becomes vehicle 0 and is controlled
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :param capacity: initial number of rows in the arrays, the arrays grow when needed
+        """
+        self.engine = engine
+        self.count = 0
+        self.state = np.zeros((capacity, 4))
+        self.previous_state = np.zeros((capacity, 4))
+        self.mass = np.zeros(capacity)
+        self.cross_section = np.zeros(capacity)
+        self.fuel = np.zeros(capacity)
+        self.exhaust_speed = np.zeros(capacity)
+        self.fuel_consumption = np.zeros(capacity)
+        self.engine_power = np.zeros(capacity)
+        self.direction = np.zeros((capacity, 2))
+        self.engine_on = np.zeros(capacity, dtype=bool)
+        self.collided = np.zeros(capacity, dtype=bool)
+        self.controlled = 0
+        self.add_vehicle(engine.rocket_parameters.parameters)
+        self.store(engine)
+
+    def grow(self):
+        """
+        Doubling the number of rows in all arrays
+        """
+        for name in ("state", "previous_state", "mass", "cross_section", "fuel", "exhaust_speed", "fuel_consumption",
+                     "engine_power", "direction", "engine_on", "collided"):
+            array = getattr(self, name)
+            grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add_vehicle(self, parameters, mass=1.0, fuel=0.0, exhaust_speed=0.0, fuel_consumption=0.0, engine_power=0.0,
+                    direction=(1, 0), cross_section=0.0):
+        """
+        Adding vehicle to the scene
+        :param parameters: [x, y, vx, vy] array of vehicle coordinates and velocity
+        :param mass: mass of the vehicle
+        :param fuel: mass of fuel stored in tanks
+        :param exhaust_speed: engine characteristic
+        :param fuel_consumption: engine characteristic
+        :param engine_power: engine power in percents, 0 if the engine is off
+        :param direction: [x, y] vector of length 1, the direction of thrust
+        :param cross_section: area of the vehicle cross-section for atmospheric drag in m^2
+        :return: number of the vehicle
+        """
+        if self.count == len(self.state):
+            self.grow()
+        i = self.count
+        self.state[i] = parameters
+        self.previous_state[i] = parameters
+        self.mass[i] = mass
+        self.fuel[i] = fuel
+        self.exhaust_speed[i] = exhaust_speed
+        self.fuel_consumption[i] = fuel_consumption
+        self.engine_power[i] = engine_power
+        self.direction[i] = direction
+        self.cross_section[i] = cross_section
+        self.engine_on[i] = engine_power > 0
+        self.collided[i] = False
+        self.count += 1
+        return i
+
+    def drop_target(self):
+        """
+        Adding a vehicle with the engine off at the current position of the controlled rocket
+        :return: number of the vehicle
+        """
+        parameters = self.engine.rocket_parameters
+        return self.add_vehicle(parameters.parameters, parameters.current_stage_mass,
+                                cross_section=self.engine.constants.cross_section)
+
+    def simulated(self):
+        """
+        Returns mask of vehicles, which are integrated by the scene: not controlled and not crashed
+        """
+        mask = ~self.collided[:self.count]
+        mask[self.controlled] = False
+        return mask
+
+    def calc_differential(self, states, time, thrust, drag_factor):
+        """
+        Calculating differential of many vehicles with the same forces as PhysicsEngine.calc_differential. Drag is
+        calculated only for the vehicles below ATMOSPHERE_CUTOFF
+        :param states: [n, 4] array of [x, y, vx, vy]
+        :param time: global time
+        :param thrust: [n, 2] array of accelerations made by engines
+        :param drag_factor: [n] array of drag_coefficient * cross_section / (2 * mass)
+        :return: [n, 4] array of [vx, vy, ax, ay]
+        """
+        constants = self.engine.constants
+        position = states[:, :2]
+        position_norm = np.linalg.norm(position, axis=1)
+        moon = position - self.engine.calc_moon_position(time)
+        acceleration = - constants.mu_Earth * position / position_norm[:, None] ** 3 - \
+            constants.mu_moon * moon / np.linalg.norm(moon, axis=1)[:, None] ** 3 + thrust
+        altitude = position_norm - constants.rad_Earth
+        inside = np.flatnonzero((altitude < trajectory_calculation.ATMOSPHERE_CUTOFF) & (drag_factor > 0))
+        if len(inside) > 0:
+            acceleration[inside] += trajectory_calculation.calc_drag(states[inside], altitude[inside],
+                                                                     drag_factor[inside])
+        return np.hstack([states[:, 2:], acceleration])
+
+    def step(self, time):
+        """
+        Processing one step of the engine for all simulated vehicles with Runge-Kutta method
+        :param time: global time at the beginning of the step
+        """
+        self.previous_state[:self.count] = self.state[:self.count]
+        vehicles = np.flatnonzero(self.simulated())
+        if len(vehicles) == 0:
+            return
+        step = self.engine.constants.step
+        burning = self.engine_on[vehicles] & (self.fuel[vehicles] > 0)
+        power = np.where(burning, self.engine_power[vehicles], 0)
+        thrust = (power * self.fuel_consumption[vehicles] * self.exhaust_speed[vehicles] /
+                  self.mass[vehicles])[:, None] * self.direction[vehicles]
+
+        drag_factor = self.engine.constants.drag_coefficient * self.cross_section[vehicles] / \
+            (2 * self.mass[vehicles])
+
+        states = self.state[vehicles]
+        k_1 = self.calc_differential(states, time, thrust, drag_factor)
+        k_2 = self.calc_differential(states + 0.5 * step * k_1, time + 0.5 * step, thrust, drag_factor)
+        k_3 = self.calc_differential(states + 0.5 * step * k_2, time + 0.5 * step, thrust, drag_factor)
+        k_4 = self.calc_differential(states + step * k_3, time + step, thrust, drag_factor)
+        self.state[vehicles] = states + (k_1 + 2 * (k_2 + k_3) + k_4) * step / 6
+
+        burnt = power * step * self.fuel_consumption[vehicles]
+        self.mass[vehicles] -= burnt
+        self.fuel[vehicles] = np.maximum(self.fuel[vehicles] - burnt, 0)
+        self.collided[vehicles] |= self.engine.detect_contacts(self.state[vehicles, :2],
+                                                               np.full(len(vehicles), time + step)) >= 0
+
+    def store(self, engine):
+        """
+        Copying state of the rocket simulated by the engine to the row of the controlled vehicle
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        """
+        i = self.controlled
+        parameters = engine.rocket_parameters
+        self.state[i] = parameters.parameters
+        self.previous_state[i] = parameters.previous_parameters
+        self.mass[i] = parameters.current_stage_mass
+        self.cross_section[i] = engine.constants.cross_section
+        self.fuel[i] = parameters.fuel_remained
+        self.exhaust_speed[i] = engine.constants.gas_exhaust_speed
+        self.fuel_consumption[i] = engine.constants.fuel_consumption
+        self.engine_power[i] = parameters.engine_power
+        self.direction[i] = parameters.direction
+        self.engine_on[i] = parameters.engine_is_on_flag
+        self.collided[i] = parameters.collision_flag
+
+    def load(self, engine):
+        """
+        Copying the row of the controlled vehicle to the engine
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        """
+        i = self.controlled
+        parameters = engine.rocket_parameters
+        parameters.parameters = self.state[i].copy()
+        parameters.previous_parameters = self.previous_state[i].copy()
+        parameters.current_stage_mass = self.mass[i]
+        engine.constants.cross_section = self.cross_section[i]
+        parameters.fuel_remained = self.fuel[i]
+        engine.constants.gas_exhaust_speed = self.exhaust_speed[i]
+        engine.constants.fuel_consumption = self.fuel_consumption[i]
+        parameters.engine_power = self.engine_power[i]
+        parameters.direction = self.direction[i].copy()
+        parameters.engine_is_on_flag = self.engine_on[i]
+        parameters.collision_flag = self.collided[i]
+
+    def select_next(self):
+        """
+        Switching control to the next vehicle, which has not crashed
+        :return: angle of the new controlled vehicle in degrees in the same form as Rocket.angle
+        """
+        self.store(self.engine)
+        for shift in range(1, self.count + 1):
+            i = (self.controlled + shift) % self.count
+            if not self.collided[i]:
+                self.controlled = i
+                break
+        self.load(self.engine)
+        self.engine.calc_predicative_orbit()
+        return np.rad2deg(np.arctan2(self.direction[self.controlled, 1], self.direction[self.controlled, 0])) - 90
+
+    def positions(self, alpha=1.0):
+        """
+        Returns positions of vehicles, which are not controlled, interpolated between the two last steps
+        :param alpha: 0 for the previous step, 1 for the current one
+        :return: [n, 2] array of coordinates, [n] array of crash flags
+        """
+        mask = np.ones(self.count, dtype=bool)
+        mask[self.controlled] = False
+        previous = self.previous_state[:self.count, :2][mask]
+        return previous + (self.state[:self.count, :2][mask] - previous) * alpha, self.collided[:self.count][mask]
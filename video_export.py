@@ -0,0 +1,218 @@
+import argparse
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+import pygame
+
+import draw_screen
+import sandbox
+import trajectory_calculation
+
+FOURCC = "mp4v"
+QUEUE_SIZE = 32
+TELEMETRY_COLUMNS = ("time", "x", "y", "vx", "vy", "angle", "engine_power", "fuel_remained")
+
+
+def use_offscreen_driver():
+    """
+    Initializing pygame with the SDL dummy video driver, so the views can be drawn without a window.
+    Must be called before anything else initializes pygame.display
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((1, 1))
+
+
+def surface_to_bytes(surface):
+    """
+    Returns raw RGB buffer of a surface
+    :param surface: pygame surface
+    """
+    if hasattr(pygame.image, "tobytes"):
+        return pygame.image.tobytes(surface, "RGB")
+    return pygame.image.tostring(surface, "RGB")
+
+
+class FrameEncoder(threading.Thread):
+    """
+    Worker thread, which takes raw frames from a bounded queue and writes them to a video file with cv2
+    """
+
+    def __init__(self, file_name, width, height, fps, queue_size=QUEUE_SIZE):
+        """
+        Initializing encoder
+        :param file_name: path to the output video
+        :param width: width of a frame
+        :param height: height of a frame
+        :param fps: frame rate of the video
+        :param queue_size: number of frames which can wait for encoding, submit blocks when the queue is full
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self.width = width
+        self.height = height
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.writer = cv2.VideoWriter(file_name, cv2.VideoWriter_fourcc(*FOURCC), fps, (width, height))
+        self.frames_written = 0
+
+    def submit(self, frame):
+        """
+        Adding frame to the queue
+        :param frame: raw RGB buffer of width x height pixels
+        """
+        self.frames.put(frame)
+
+    def run(self):
+        """
+        Encoding frames until None is received
+        """
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            image = np.frombuffer(frame, dtype=np.uint8).reshape((self.height, self.width, 3))
+            self.writer.write(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+            self.frames_written += 1
+        self.writer.release()
+
+    def close(self):
+        """
+        Waiting for all submitted frames to be encoded and closing the file
+        """
+        self.frames.put(None)
+        self.join()
+
+
+class FrameExporter:
+    """
+    Draws the views of the play menu onto an offscreen surface with the same layout as the window
+    """
+
+    def __init__(self, rocket, width, height):
+        """
+        Initializing exporter
+        :param rocket: object of class Rocket from sandbox
+        :param width: width of a frame
+        :param height: height of a frame
+        """
+        self.width = width
+        self.height = height
+        self.rocket = rocket
+        self.surface = pygame.Surface((width, height))
+        self.views = [draw_screen.RocketView(width, height, rocket),
+                      draw_screen.SpaceView(width, height, rocket),
+                      draw_screen.ParametersView(width, height, rocket)]
+
+    def render(self, engine):
+        """
+        Drawing all views for the current state of the engine
+        :param engine: object of class PhysicsEngine from trajectory_calculation
+        :return: raw RGB buffer of the frame
+        """
+        for view in self.views:
+            view.set_engine(engine)
+            view.draw()
+            self.surface.blit(view.surface, (view.x, view.y))
+        return surface_to_bytes(self.surface)
+
+
+def create_engine(rocket, engine_power):
+    """
+    Creating engine for a rocket standing on the launch site, the same way as the play menu does
+    :param rocket: object of class Rocket from sandbox
+    :param engine_power: engine power in percents
+    :return: object of class PhysicsEngine from trajectory_calculation
+    """
+    engine = trajectory_calculation.PhysicsEngine(*rocket.get_active_parameters(), [6.37e6, 0, 0, 0])
+    engine.switch_engine(True, engine_power)
+    engine.constants.cross_section = rocket.cross_section()
+    engine.set_rocket_direction(np.deg2rad(rocket.angle + 90))
+    return engine
+
+
+def telemetry_row(engine, rocket):
+    """
+    Returns the state of the flight as a row of TELEMETRY_COLUMNS
+    :param engine: object of class PhysicsEngine from trajectory_calculation
+    :param rocket: object of class Rocket from sandbox
+    """
+    parameters = engine.rocket_parameters
+    return [parameters.current_time, *parameters.parameters, rocket.angle, parameters.engine_power,
+            parameters.fuel_remained]
+
+
+def export_simulation(rocket, file_name, frames, engine_power=50, steps_per_frame=1, fps=30, size=(1280, 720)):
+    """
+    Simulating the flight with fixed controls and rendering it to a video. Predicative orbit is calculated once per
+    frame instead of once per step
+    :param rocket: object of class Rocket from sandbox
+    :param file_name: path to the output video
+    :param frames: number of frames to render
+    :param engine_power: engine power in percents
+    :param steps_per_frame: number of physics steps between two frames
+    :param fps: frame rate of the video
+    :param size: (width, height) of the video
+    :return: telemetry array [frames, len(TELEMETRY_COLUMNS)] of the rendered flight
+    """
+    engine = create_engine(rocket, engine_power)
+    exporter = FrameExporter(rocket, *size)
+    encoder = FrameEncoder(file_name, *size, fps)
+    encoder.start()
+    telemetry = []
+    for _ in range(frames):
+        if engine.rocket_parameters.collision_flag:
+            break
+        for _ in range(steps_per_frame):
+            engine.calc_step()
+            engine.detect_collision()
+        engine.calc_predicative_orbit()
+        telemetry.append(telemetry_row(engine, rocket))
+        encoder.submit(exporter.render(engine))
+    encoder.close()
+    return np.array(telemetry)
+
+
+def export_telemetry(rocket, telemetry, file_name, fps=30, size=(1280, 720), predict=True):
+    """
+    Rendering recorded telemetry to a video, one frame per row
+    :param rocket: object of class Rocket from sandbox
+    :param telemetry: array [n, len(TELEMETRY_COLUMNS)]
+    :param file_name: path to the output video
+    :param fps: frame rate of the video
+    :param size: (width, height) of the video
+    :param predict: whether to calculate predicative orbit for each frame
+    """
+    engine = create_engine(rocket, 0)
+    parameters = engine.rocket_parameters
+    exporter = FrameExporter(rocket, *size)
+    encoder = FrameEncoder(file_name, *size, fps)
+    encoder.start()
+    for time, x, y, vx, vy, angle, engine_power, fuel_remained in telemetry:
+        parameters.parameters = np.array([x, y, vx, vy])
+        parameters.previous_parameters = parameters.parameters
+        parameters.current_time = parameters.previous_time = time
+        parameters.engine_power = engine_power
+        parameters.fuel_remained = fuel_remained
+        rocket.angle = rocket.previous_angle = angle
+        if predict:
+            engine.calc_predicative_orbit()
+        encoder.submit(exporter.render(engine))
+    encoder.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a recorded flight to a video without opening a window")
+    parser.add_argument("rocket", help="rocket file saved by sandbox.save_rocket")
+    parser.add_argument("telemetry", help=".npy file with rows of " + ", ".join(TELEMETRY_COLUMNS))
+    parser.add_argument("output", help="output video file")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    use_offscreen_driver()
+    export_telemetry(sandbox.load_rocket(args.rocket), np.load(args.telemetry), args.output, fps=args.fps,
+                     size=(args.width, args.height))